@@ -1,39 +1,72 @@
-from fastapi import FastAPI, Depends, HTTPException, Header
+from fastapi import FastAPI, Depends, HTTPException, Header, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from typing import List
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
-import redis
+from contextlib import asynccontextmanager
+import asyncio
+import json
 import uuid
 from config.config import config
-from db.database import get_db, User, Assessment, Subscription, RateLimit, CommunityThreat, Resource
-from db.breach_data import check_breaches
-from core.scoring import calculate_email_score, calculate_url_score, calculate_ip_score
-from core.security_apis import check_email_reputation, check_url_security, check_ip_reputation, check_shodan_host
-from core.report_generator import generate_report
-from core.notifications import send_notification
-from core.community import report_threat, get_community_threats
+from db.database import get_db, get_async_db, async_engine, User, Assessment, Subscription, RateLimit, CommunityThreat, Resource
+from core.assessment import assess_email_target, assess_url_target, assess_ip_target, build_record, run_batch, dedupe_key
+from core.quotas import reserve_quota, release_quota, get_usage
+from core.write_behind import assessment_writer
+from core.security_apis import shodan_cache, single_flight
+from core.report_generator import generate_report, pack_report, report_json
+from core.notifications import notification_queue
+from core.http_client import init_http_session, close_http_session
+from core import passwords
+from core.user_cache import user_cache, AuthenticatedUser
+from core.rate_limiter import FailoverRateLimiter
+from core.redis_client import get_redis, init_redis, close_redis, redis_healthy
+from core.jobs import job_queue, public_job
+from core.community_index import community_index
+from core.community import report_threat, get_community_threats, get_community_rollups, cached_page, feed_cache
 from db.resources import get_resources, add_resource
-from reports.pdf_generator import generate_pdf_report
+from db.assessments import history_query, history_count, LIST_COLUMNS, REPORT_COLUMNS
+from db.migrate import migrate
+from reports.pdf_cache import pdf_cache
+from reports.export import EXPORTERS
 from utils.validators import validate_email, validate_url, validate_ip
+from utils.pagination import encode_cursor, decode_cursor
+from utils.http import etag_matches, file_range_response
 from utils.logger import logger
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if config.DB_AUTO_MIGRATE:
+        await asyncio.to_thread(migrate)
+    await init_http_session()
+    rate_limiter.redis_available = await init_redis()
+    if not rate_limiter.redis_available:
+        logger.warning("Redis unavailable; using in-process rate limiting until it is back")
+    await job_queue.connect()
+    await notification_queue.start()
+    user_cache.start()
+    rate_limiter.start()
+    assessment_writer.start()
+    await community_index.start()
+    yield
+    await community_index.stop()
+    await assessment_writer.stop()
+    await rate_limiter.stop()
+    await user_cache.stop()
+    await job_queue.close()
+    await notification_queue.stop()
+    await close_http_session()
+    await async_engine.dispose()
+    await close_redis()
+    passwords.shutdown()
+    pdf_cache.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-# Attempt to connect to Redis, but allow fallback if it fails
-try:
-    redis_client = redis.Redis.from_url(config.REDIS_URL, decode_responses=True)
-    redis_client.ping()
-    logger.info("Connected to Redis successfully")
-    USE_REDIS = True
-except Exception as e:
-    logger.warning(f"Failed to connect to Redis: {e}. Disabling rate limiting.")
-    USE_REDIS = False
-    redis_client = None
 
 # Pydantic Models
 class UserCreate(BaseModel):
@@ -54,6 +87,13 @@ class URLAssessmentRequest(BaseModel):
 class IPAssessmentRequest(BaseModel):
     ip: str
 
+class BatchTarget(BaseModel):
+    type: str
+    target: str
+
+class BatchAssessmentRequest(BaseModel):
+    targets: List[BatchTarget]
+
 class CommunityThreatRequest(BaseModel):
     target: str
     type: str
@@ -73,169 +113,276 @@ def create_access_token(data: dict, expires_delta: timedelta = timedelta(minutes
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, config.JWT_SECRET, algorithm="HS256")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     try:
         payload = jwt.decode(token, config.JWT_SECRET, algorithms=["HS256"])
         email = payload.get("sub")
         if not email:
             raise HTTPException(status_code=401, detail="Invalid token")
-        user = db.query(User).filter(User.email == email).first()
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
+        user = user_cache.get(email)
+        if user is None:
+            row = (await db.execute(select(User.id, User.email, User.plan).where(User.email == email))).first()
+            if not row:
+                raise HTTPException(status_code=401, detail="User not found")
+            user = AuthenticatedUser(id=row.id, email=row.email, plan=row.plan)
+            user_cache.set(email, user)
         return user
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 # Rate Limiting
-async def check_rate_limit(user: User, endpoint: str, db: Session):
-    if not USE_REDIS:
-        logger.info("Redis not available, skipping rate limiting")
-        return  # Skip rate limiting if Redis isn't available
+rate_limiter = FailoverRateLimiter(
+    get_redis,
+    config.RATE_LIMIT_ALGORITHM,
+    max_local_keys=config.RATE_LIMIT_LOCAL_MAX_KEYS,
+    local_idle_ttl=config.RATE_LIMIT_LOCAL_IDLE_TTL,
+    reconnect_interval=config.RATE_LIMIT_RECONNECT_INTERVAL,
+)
 
+async def check_rate_limit(user: AuthenticatedUser, endpoint: str, response: Response):
     limits = config.PREMIUM_LIMITS if user.plan == "premium" else config.FREE_LIMITS
-    key = f"rate_limit:{user.id}:{endpoint}"
-    current_count = redis_client.get(key)
-    
-    if current_count is None:
-        redis_client.setex(key, 60, 1)
-    elif int(current_count) >= limits["requests_per_minute"]:
-        raise HTTPException(status_code=429, detail="Rate limit exceeded")
-    else:
-        redis_client.incr(key)
+    result = await rate_limiter.hit(f"rate_limit:{user.id}:{endpoint}", limits["requests_per_minute"], 60)
+    if not result.allowed:
+        raise HTTPException(status_code=429, detail="Rate limit exceeded", headers=result.headers())
+    response.headers.update(result.headers())
+
+async def enqueue_assessment(type: str, target: str, user: AuthenticatedUser, response: Response, quota_reserved: int = 0):
+    job = await job_queue.enqueue(type, target, user.id, user.email, quota_reserved)
+    return JSONResponse(status_code=202, headers=dict(response.headers), content={"success": True, "data": {
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": f"/api/jobs/{job['id']}",
+        "events_url": f"/api/jobs/{job['id']}/events",
+    }})
+
+async def get_user_job(job_id: str, user: AuthenticatedUser) -> dict:
+    job = await job_queue.get(job_id)
+    if not job or job["user_id"] != str(user.id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 # Endpoints
 @app.post("/api/auth/register")
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     validate_email(user.email)
-    if db.query(User).filter(User.email == user.email).first():
+    if (await db.execute(select(User.id).where(User.email == user.email))).first():
         raise HTTPException(status_code=400, detail="Email already registered")
-    password_hash = pwd_context.hash(user.password)
+    password_hash = await passwords.hash_password(user.password)
     db_user = User(email=user.email, password_hash=password_hash, name=user.name)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     token = create_access_token({"sub": user.email})
     return {"success": True, "data": {"user": {"id": str(db_user.id), "email": db_user.email, "name": db_user.name, "plan": db_user.plan}, "token": token}}
 
 @app.post("/api/auth/login")
-async def login(user: UserLogin, db: Session = Depends(get_db)):
+async def login(user: UserLogin, db: AsyncSession = Depends(get_async_db)):
     validate_email(user.email)
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if not db_user or not pwd_context.verify(user.password, db_user.password_hash):
+    db_user = (await db.execute(select(User).where(User.email == user.email))).scalars().first()
+    if not db_user or not await passwords.verify_password(user.password, db_user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     token = create_access_token({"sub": user.email})
     return {"success": True, "data": {"user": {"id": str(db_user.id), "email": db_user.email, "name": db_user.name, "plan": db_user.plan}, "token": token}}
 
 @app.post("/api/assess/email")
-async def assess_email(request: EmailAssessmentRequest, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    await check_rate_limit(user, "assess_email", db)
+async def assess_email(request: EmailAssessmentRequest, response: Response, async_mode: bool = False, user: AuthenticatedUser = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    await check_rate_limit(user, "assess_email", response)
     validate_email(request.email)
+    async with reserve_quota(db, user) as reserved:
+        if async_mode:
+            return await enqueue_assessment("email", request.email, user, response, reserved)
+        
+        assessment = await assess_email_target(request.email)
+        record, report = build_record(assessment, user.id)
+        
+        await assessment_writer.write(db, [record])
     
-    # Email reputation and Shodan check for the domain
-    email_data = await check_email_reputation(request.email)
-    shodan_data = await check_shodan_host(request.email.split("@")[1])
-    email_data.update(shodan_data)
-    email_data["breaches"] = check_breaches(request.email)
-    score = calculate_email_score(email_data)
-    status = "Secure" if score >= 75 else "Moderate" if score >= 50 else "High Risk"
-    threats = email_data.get("phishing_indicators", []) + ([f"Breach: {b}" for b in email_data["breaches"]] if email_data["breaches"] else []) + email_data.get("threats", [])
-    
-    assessment = {"target": request.email, "type": "email", "score": score, "status": status, "threats": threats, "details": email_data}
-    report = generate_report(assessment)
-    
-    db_assessment = Assessment(**assessment, user_id=user.id, report_id=report["report_id"])
-    db.add(db_assessment)
-    db.commit()
-    
-    send_notification(user.email, assessment)
+    await notification_queue.enqueue(user.email, assessment)
     return {"success": True, "data": {**assessment, "report_id": report["report_id"], "timestamp": report["created_at"]}}
 
 @app.post("/api/assess/url")
-async def assess_url(request: URLAssessmentRequest, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    await check_rate_limit(user, "assess_url", db)
+async def assess_url(request: URLAssessmentRequest, response: Response, async_mode: bool = False, user: AuthenticatedUser = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    await check_rate_limit(user, "assess_url", response)
     validate_url(request.url)
+    async with reserve_quota(db, user) as reserved:
+        if async_mode:
+            return await enqueue_assessment("url", request.url, user, response, reserved)
+        
+        assessment = await assess_url_target(request.url)
+        record, report = build_record(assessment, user.id)
+        
+        await assessment_writer.write(db, [record])
     
-    url_data = await check_url_security(request.url)
-    score = calculate_url_score(url_data)
-    status = "Secure" if score >= 75 else "Moderate" if score >= 50 else "High Risk"
-    threats = url_data.get("threats", [])
-    
-    assessment = {"target": request.url, "type": "url", "score": score, "status": status, "threats": threats, "details": url_data}
-    report = generate_report(assessment)
-    
-    db_assessment = Assessment(**assessment, user_id=user.id, report_id=report["report_id"])
-    db.add(db_assessment)
-    db.commit()
-    
-    send_notification(user.email, assessment)
+    await notification_queue.enqueue(user.email, assessment)
     return {"success": True, "data": {**assessment, "report_id": report["report_id"], "timestamp": report["created_at"]}}
 
 @app.post("/api/assess/ip")
-async def assess_ip(request: IPAssessmentRequest, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    await check_rate_limit(user, "assess_ip", db)
+async def assess_ip(request: IPAssessmentRequest, response: Response, async_mode: bool = False, user: AuthenticatedUser = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    await check_rate_limit(user, "assess_ip", response)
     validate_ip(request.ip)
+    async with reserve_quota(db, user) as reserved:
+        if async_mode:
+            return await enqueue_assessment("ip", request.ip, user, response, reserved)
+        
+        assessment = await assess_ip_target(request.ip)
+        record, report = build_record(assessment, user.id)
+        
+        await assessment_writer.write(db, [record])
     
-    ip_data = await check_ip_reputation(request.ip)
-    score = calculate_ip_score(ip_data)
-    status = "Secure" if score >= 75 else "Moderate" if score >= 50 else "High Risk"
-    threats = ip_data.get("threats", [])
-    
-    assessment = {"target": request.ip, "type": "ip", "score": score, "status": status, "threats": threats, "details": ip_data}
-    report = generate_report(assessment)
-    
-    db_assessment = Assessment(**assessment, user_id=user.id, report_id=report["report_id"])
-    db.add(db_assessment)
-    db.commit()
-    
-    send_notification(user.email, assessment)
+    await notification_queue.enqueue(user.email, assessment)
     return {"success": True, "data": {**assessment, "report_id": report["report_id"], "timestamp": report["created_at"]}}
 
-@app.get("/api/reports/{report_id}")
-async def get_report(report_id: str, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    assessment = db.query(Assessment).filter(Assessment.report_id == report_id, Assessment.user_id == user.id).first()
-    if not assessment:
+@app.post("/api/assess/batch")
+async def assess_batch(request: BatchAssessmentRequest, response: Response, user: AuthenticatedUser = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    await check_rate_limit(user, "assess_batch", response)
+    if not request.targets:
+        raise HTTPException(status_code=400, detail="No targets provided")
+    if len(request.targets) > config.BATCH_MAX_TARGETS:
+        raise HTTPException(status_code=400, detail=f"Batch exceeds {config.BATCH_MAX_TARGETS} targets")
+    async with reserve_quota(db, user, count=len({dedupe_key(t.type, t.target) for t in request.targets})) as reserved:
+        results = await run_batch([(t.type, t.target) for t in request.targets], config.BATCH_CONCURRENCY)
+        
+        # Persist every successful assessment in a single multi-row insert
+        records = []
+        for result in results:
+            if result["success"]:
+                # Store and return the target as the user submitted it, like the single-target endpoints
+                assessment = {**result.pop("assessment"), "target": result["target"]}
+                record, report = build_record(assessment, user.id)
+                records.append(record)
+                result["data"] = {**assessment, "report_id": report["report_id"], "timestamp": report["created_at"]}
+        rejected = await assessment_writer.write(db, records)
+        for result in results:
+            if result["success"] and result["data"]["report_id"] in rejected:
+                result.update(success=False, error="Assessment could not be saved")
+                del result["data"]
+        records = [record for record in records if record["report_id"] not in rejected]
+    # Failed targets don't count against the quota
+    await release_quota(user.id, min(reserved, len(results) - len(records)))
+    
+    return {"success": True, "data": {"results": results, "summary": {"submitted": len(request.targets), "unique": len(results), "succeeded": len(records), "failed": len(results) - len(records)}}}
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, user: AuthenticatedUser = Depends(get_current_user)):
+    job = await get_user_job(job_id, user)
+    return {"success": True, "data": public_job(job)}
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, user: AuthenticatedUser = Depends(get_current_user)):
+    await get_user_job(job_id, user)
+    return StreamingResponse(job_queue.events(job_id), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def pdf_source(report: dict) -> dict:
+    # generate_pdf_report takes assessment-shaped input; the snapshot keeps threats under summary
+    return {**report, "threats": report["summary"]["primary_threats"]}
+
+async def load_report_snapshot(report_id: str, user: AuthenticatedUser, db: AsyncSession) -> tuple:
+    # Returns (snapshot, etag) with a single indexed lookup
+    pending = assessment_writer.lookup(report_id, user.id)
+    if pending is not None:
+        return pending["report_snapshot"], pending["report_etag"]
+    row = (await db.execute(select(Assessment.id, Assessment.report_snapshot, Assessment.report_etag).where(Assessment.report_id == report_id, Assessment.user_id == user.id))).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Report not found")
-    report = generate_report(assessment.__dict__)
-    return {"success": True, "data": report}
+    if row.report_snapshot is not None:
+        return row.report_snapshot, row.report_etag
+    # Rows stored before snapshots existed are built once and written back
+    assessment = (await db.execute(select(*REPORT_COLUMNS).where(Assessment.id == row.id))).mappings().one()
+    snapshot, etag = pack_report(generate_report(dict(assessment)))
+    await db.execute(update(Assessment).where(Assessment.id == row.id).values(report_snapshot=snapshot, report_etag=etag))
+    await db.commit()
+    return snapshot, etag
+
+@app.get("/api/reports/export")
+async def export_reports(response: Response, format: str = "ndjson", type: str = None, status: str = None, start: datetime = None, end: datetime = None, user: AuthenticatedUser = Depends(get_current_user)):
+    # Declared before /api/reports/{report_id} so "export" isn't taken for a report id
+    await check_rate_limit(user, "export_reports", response)
+    if format not in EXPORTERS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format: {format}")
+    exporter, media_type, extension = EXPORTERS[format]
+    filters = {"type": type, "status": status, "start": start, "end": end}
+    headers = {**response.headers, "Content-Disposition": f'attachment; filename="cybershield-reports.{extension}"', "Cache-Control": "no-store"}
+    return StreamingResponse(exporter(user.id, filters), media_type=media_type, headers=headers)
+
+@app.get("/api/reports/{report_id}")
+async def get_report(report_id: str, if_none_match: str = Header(None), user: AuthenticatedUser = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    snapshot, etag = await load_report_snapshot(report_id, user, db)
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={config.REPORT_CACHE_MAX_AGE}"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    # The stored snapshot is already the serialized report; splice it in rather than re-encoding
+    return Response(b'{"success":true,"data":' + report_json(snapshot) + b"}", media_type="application/json", headers=headers)
 
 @app.get("/api/reports/{report_id}/download")
-async def download_report(report_id: str, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    assessment = db.query(Assessment).filter(Assessment.report_id == report_id, Assessment.user_id == user.id).first()
-    if not assessment:
-        raise HTTPException(status_code=404, detail="Report not found")
-    pdf_bytes = generate_pdf_report(assessment.__dict__)
-    return {"success": True, "data": pdf_bytes.hex()}  # Hex-encoded for simplicity
+async def download_report(report_id: str, format: str = "pdf", range_header: str = Header(None, alias="Range"), if_range: str = Header(None), if_none_match: str = Header(None), user: AuthenticatedUser = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    snapshot, etag = await load_report_snapshot(report_id, user, db)
+    content_hash = etag.strip('"')
+    headers = {
+        "ETag": f'"pdf-{content_hash}"',
+        "Cache-Control": f"private, max-age={config.REPORT_CACHE_MAX_AGE}",
+        "Content-Disposition": f'attachment; filename="{report_id}.pdf"',
+    }
+    if format != "hex" and etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    for attempt in range(2):
+        path = await pdf_cache.get(report_id, content_hash, lambda: pdf_source(json.loads(report_json(snapshot))))
+        try:
+            if format == "hex":
+                # Legacy JSON form
+                return {"success": True, "data": (await asyncio.to_thread(path.read_bytes)).hex()}
+            return await file_range_response(str(path), "application/pdf", headers, range_header, if_range)
+        except FileNotFoundError:
+            # Evicted between the cache lookup and opening it; the next get() renders it again
+            if attempt:
+                raise
 
 @app.get("/api/history")
-async def get_history(page: int = 1, limit: int = 10, type: str = None, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    query = db.query(Assessment).filter(Assessment.user_id == user.id)
-    if type:
-        query = query.filter(Assessment.type == type)
-    total = query.count()
-    assessments = query.offset((page - 1) * limit).limit(limit).all()
+async def get_history(page: int = None, limit: int = 10, type: str = None, cursor: str = None, include_total: bool = None, user: AuthenticatedUser = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    limit = max(1, min(limit, config.HISTORY_MAX_LIMIT))
+    # Page-number paging with totals unless the caller passes a cursor; next_cursor lets clients switch to keyset paging
+    legacy = cursor is None and page is not None and page > 1
+    if include_total is None:
+        include_total = cursor is None
+    query = history_query(user.id, type, decode_cursor(cursor) if cursor else None, columns=LIST_COLUMNS)
+    if legacy:
+        query = query.offset((page - 1) * limit)
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    assessments, has_next = rows[:limit], len(rows) > limit
+    total = None
+    if include_total:
+        total = (await db.execute(history_count(user.id, type))).scalar_one()
+    current_page = (page or 1) if cursor is None else None
     return {
         "success": True,
         "data": {
             "assessments": [{"report_id": a.report_id, "target": a.target, "type": a.type, "score": a.score, "status": a.status, "created_at": a.created_at.isoformat()} for a in assessments],
-            "pagination": {"current_page": page, "total_pages": (total + limit - 1) // limit, "total_items": total, "has_next": page * limit < total, "has_prev": page > 1}
+            "pagination": {
+                "current_page": current_page,
+                "total_pages": (total + limit - 1) // limit if total is not None else None,
+                "total_items": total,
+                "has_next": has_next,
+                "has_prev": cursor is not None or (current_page or 1) > 1,
+                "next_cursor": encode_cursor(assessments[-1].created_at, assessments[-1].id) if has_next else None,
+            }
         }
     }
 
 @app.post("/api/subscription/premium")
-async def subscribe_premium(plan_type: str, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def subscribe_premium(plan_type: str, user: AuthenticatedUser = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     if plan_type not in ["monthly", "yearly"]:
         raise HTTPException(status_code=400, detail="Invalid plan type")
     sub_id = f"sub_{uuid.uuid4().hex[:8]}"
     db_sub = Subscription(user_id=user.id, stripe_subscription_id=sub_id, plan_type=plan_type, status="active", current_period_start=datetime.utcnow(), current_period_end=datetime.utcnow() + timedelta(days=30))
     db.add(db_sub)
-    user.plan = "premium"
-    db.commit()
+    await db.execute(update(User).where(User.id == user.id).values(plan="premium"))
+    await db.commit()
+    await user_cache.invalidate(user.email)
     return {"success": True, "data": {"subscription_id": sub_id, "client_secret": "mock_secret", "plan_type": plan_type, "amount": 999, "currency": "usd"}}
 
 @app.get("/api/subscription/status")
-async def get_subscription_status(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    sub = db.query(Subscription).filter(Subscription.user_id == user.id, Subscription.status == "active").first()
-    scans = db.query(Assessment).filter(Assessment.user_id == user.id, Assessment.created_at >= datetime.utcnow().replace(day=1)).count()
+async def get_subscription_status(user: AuthenticatedUser = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    sub = (await db.execute(select(Subscription).where(Subscription.user_id == user.id, Subscription.status == "active").limit(1))).scalars().first()
+    usage = await get_usage(db, user.id)
     return {
         "success": True,
         "data": {
@@ -243,33 +390,67 @@ async def get_subscription_status(user: User = Depends(get_current_user), db: Se
             "status": sub.status if sub else "inactive",
             "current_period_end": sub.current_period_end.isoformat() if sub else None,
             "cancel_at_period_end": sub.cancel_at_period_end if sub else False,
-            "usage": {"scans_this_month": scans, "scans_limit": -1 if user.plan == "premium" else 100}
+            "usage": {"scans_this_month": usage["scans_this_month"], "scans_limit": (config.PREMIUM_LIMITS if user.plan == "premium" else config.FREE_LIMITS)["scans_per_month"]}
         }
     }
 
 @app.get("/api/limits")
-async def get_limits(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_limits(user: AuthenticatedUser = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     limits = config.PREMIUM_LIMITS if user.plan == "premium" else config.FREE_LIMITS
-    scans_today = db.query(Assessment).filter(Assessment.user_id == user.id, Assessment.created_at >= datetime.utcnow().replace(hour=0, minute=0, second=0)).count()
-    scans_month = db.query(Assessment).filter(Assessment.user_id == user.id, Assessment.created_at >= datetime.utcnow().replace(day=1)).count()
+    usage = await get_usage(db, user.id)
     return {
         "success": True,
         "data": {
             "plan": user.plan,
             "limits": {"scans_per_day": limits["scans_per_day"], "scans_per_month": limits["scans_per_month"], "detailed_reports": user.plan == "premium"},
-            "usage": {"scans_today": scans_today, "scans_this_month": scans_month, "reset_time": (datetime.utcnow() + timedelta(days=1)).replace(hour=0, minute=0, second=0).isoformat()}
+            "usage": {"scans_today": usage["scans_today"], "scans_this_month": usage["scans_this_month"], "reset_time": (datetime.utcnow() + timedelta(days=1)).replace(hour=0, minute=0, second=0).isoformat()}
         }
     }
 
 @app.post("/api/community/report")
-async def report_community_threat(request: CommunityThreatRequest, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    threat = report_threat(db, user.id, request.target, request.type, request.threat_type, request.severity, request.details)
+async def report_community_threat(request: CommunityThreatRequest, user: AuthenticatedUser = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    threat = await report_threat(db, user.id, request.target, request.type, request.threat_type, request.severity, request.details)
     return {"success": True, "data": {"id": str(threat.id), "target": threat.target, "type": threat.type, "threat_type": threat.threat_type, "severity": threat.severity}}
 
+def cached_json_response(page: dict, if_none_match: str = None):
+    headers = {"ETag": page["etag"], "Cache-Control": f"public, max-age={config.COMMUNITY_FEED_TTL}"}
+    if etag_matches(if_none_match, page["etag"]):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse({"success": True, "data": page["data"]}, headers=headers)
+
 @app.get("/api/community/threats")
-async def list_community_threats(db: Session = Depends(get_db)):
-    threats = get_community_threats(db)
-    return {"success": True, "data": [{"id": str(t.id), "target": t.target, "type": t.type, "threat_type": t.threat_type, "severity": t.severity} for t in threats]}
+async def list_community_threats(limit: int = 50, cursor: str = None, type: str = None, severity: str = None, threat_type: str = None, since: datetime = None, if_none_match: str = Header(None), db: AsyncSession = Depends(get_async_db)):
+    limit = max(1, min(limit, config.COMMUNITY_FEED_MAX_LIMIT))
+    filters = {"type": type, "severity": severity, "threat_type": threat_type, "since": since}
+    page = await cached_page("threats", {"limit": limit, "cursor": cursor, **filters}, lambda: get_community_threats(db, limit, decode_cursor(cursor) if cursor else None, **filters))
+    return cached_json_response(page, if_none_match)
+
+@app.get("/api/community/rollups")
+async def list_community_rollups(limit: int = 50, cursor: str = None, type: str = None, target: str = None, min_severity: str = None, if_none_match: str = Header(None), db: AsyncSession = Depends(get_async_db)):
+    limit = max(1, min(limit, config.COMMUNITY_FEED_MAX_LIMIT))
+    filters = {"type": type, "target": target, "min_severity": min_severity}
+    page = await cached_page("rollups", {"limit": limit, "cursor": cursor, **filters}, lambda: get_community_rollups(db, limit, decode_cursor(cursor) if cursor else None, **filters))
+    return cached_json_response(page, if_none_match)
+
+@app.get("/api/health")
+async def health():
+    redis_ok = await redis_healthy()
+    return {"success": True, "data": {"status": "ok" if redis_ok else "degraded", "redis": redis_ok, "rate_limiter": rate_limiter.stats()["backend"]}}
+
+@app.get("/api/metrics")
+async def get_metrics():
+    return {"success": True, "data": {
+        "shodan_cache": shodan_cache.stats(),
+        "community_feed_cache": feed_cache.stats(),
+        "provider_single_flight": single_flight.stats(),
+        "notifications": {**notification_queue.stats(), "queue_depth": await notification_queue.depth()},
+        "password_hashing": passwords.stats(),
+        "user_cache": user_cache.stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "assessment_writer": assessment_writer.stats(),
+        "community_index": community_index.stats(),
+        "pdf_cache": pdf_cache.stats(),
+    }}
 
 @app.get("/api/resources")
 async def get_educational_resources(category: str = None, db: Session = Depends(get_db)):
@@ -277,7 +458,7 @@ async def get_educational_resources(category: str = None, db: Session = Depends(
     return {"success": True, "data": [{"id": str(r.id), "title": r.title, "content": r.content, "category": r.category} for r in resources]}
 
 @app.post("/api/resources")
-async def add_educational_resource(request: ResourceRequest, user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def add_educational_resource(request: ResourceRequest, user: AuthenticatedUser = Depends(get_current_user), db: Session = Depends(get_db)):
     if user.plan != "premium":
         raise HTTPException(status_code=403, detail="Premium feature")
     resource = add_resource(db, request.title, request.content, request.category)
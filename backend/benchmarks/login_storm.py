@@ -0,0 +1,73 @@
+"""Measure /api/assess/* latency while a login storm hits the same server.
+
+Run against a live instance (python main.py):
+
+    python benchmarks/login_storm.py --base-url http://localhost:3001 --logins 200 --assessments 100
+
+Compare the p99 of the "assess during storm" line with the baseline line:
+with hashing offloaded it should stay close to the baseline instead of
+growing with the number of concurrent logins. Assessments are spread over
+enough throwaway users to stay under the free-plan per-minute rate limit;
+any non-2xx responses are counted separately and left out of the percentiles.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+import aiohttp
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] * 1000 if ordered else 0.0
+
+def report(label: str, results: list):
+    samples = [elapsed for elapsed, status in results if status < 300]
+    rejected = len(results) - len(samples)
+    print(f"{label:<28} n={len(samples):<5} p50={percentile(samples, 0.50):8.1f}ms  p99={percentile(samples, 0.99):8.1f}ms  non-2xx={rejected}")
+
+async def timed(session: aiohttp.ClientSession, method: str, url: str, **kwargs) -> tuple:
+    start = time.perf_counter()
+    async with session.request(method, url, **kwargs) as response:
+        await response.read()
+        return time.perf_counter() - start, response.status
+
+PASSWORD = "benchmark-password"
+ASSESSMENTS_PER_USER = 5
+
+async def register(session, base_url: str) -> tuple:
+    email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+    async with session.post(f"{base_url}/api/auth/register", json={"email": email, "password": PASSWORD, "name": "Benchmark"}) as response:
+        return email, {"Authorization": f"Bearer {(await response.json())['data']['token']}"}
+
+async def assess_loop(session, base_url: str, count: int, concurrency: int) -> list:
+    users = [await register(session, base_url) for _ in range(-(-count // ASSESSMENTS_PER_USER))]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            return await timed(session, "POST", f"{base_url}/api/assess/ip", json={"ip": "8.8.8.8"}, headers=users[i // ASSESSMENTS_PER_USER][1])
+
+    return await asyncio.gather(*[one(i) for i in range(count)])
+
+async def main(args):
+    async with aiohttp.ClientSession() as session:
+        email, _ = await register(session, args.base_url)
+
+        report("assess baseline", await assess_loop(session, args.base_url, args.assessments, args.concurrency))
+
+        storm = asyncio.gather(*[
+            timed(session, "POST", f"{args.base_url}/api/auth/login", json={"email": email, "password": PASSWORD})
+            for _ in range(args.logins)
+        ])
+        during = await assess_loop(session, args.base_url, args.assessments, args.concurrency)
+        logins = await storm
+        report("assess during storm", during)
+        report("login", logins)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:3001")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--assessments", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
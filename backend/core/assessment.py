@@ -0,0 +1,80 @@
+import asyncio
+from datetime import datetime
+from fastapi import HTTPException
+from db.breach_data import check_breaches
+from core.scoring import calculate_email_score, calculate_url_score, calculate_ip_score
+from core.security_apis import check_email_reputation, check_url_security, check_ip_reputation, check_shodan_host, with_deadline, empty_shodan_result, normalize_target
+from core.report_generator import generate_report, pack_report
+from utils.validators import validate_email, validate_url, validate_ip
+
+def risk_status(score: int) -> str:
+    return "Secure" if score >= 75 else "Moderate" if score >= 50 else "High Risk"
+
+def community_threats(data: dict) -> list:
+    return [f"Community reported: {data['community_severity']}"] if data.get("community_severity") else []
+
+async def assess_email_target(email: str) -> dict:
+    # Email reputation, Shodan check for the domain and breach lookup run concurrently
+    email_data, shodan_data, breaches = await asyncio.gather(
+        with_deadline(check_email_reputation(email), "emailrep", {}),
+        with_deadline(check_shodan_host(email.split("@")[1]), "shodan", empty_shodan_result()),
+        with_deadline(asyncio.to_thread(check_breaches, email), "breaches", []),
+    )
+    email_data.update(shodan_data)
+    email_data["breaches"] = breaches
+    score = calculate_email_score(email_data, email)
+    threats = email_data.get("phishing_indicators", []) + ([f"Breach: {b}" for b in email_data["breaches"]] if email_data["breaches"] else []) + email_data.get("threats", []) + community_threats(email_data)
+    return {"target": email, "type": "email", "score": score, "status": risk_status(score), "threats": threats, "details": email_data}
+
+async def assess_url_target(url: str) -> dict:
+    url_data = await check_url_security(url)
+    score = calculate_url_score(url_data, url)
+    return {"target": url, "type": "url", "score": score, "status": risk_status(score), "threats": url_data.get("threats", []) + community_threats(url_data), "details": url_data}
+
+async def assess_ip_target(ip: str) -> dict:
+    ip_data = await check_ip_reputation(ip)
+    score = calculate_ip_score(ip_data, ip)
+    return {"target": ip, "type": "ip", "score": score, "status": risk_status(score), "threats": ip_data.get("threats", []) + community_threats(ip_data), "details": ip_data}
+
+# type -> (validator, pipeline)
+ASSESSORS = {
+    "email": (validate_email, assess_email_target),
+    "url": (validate_url, assess_url_target),
+    "ip": (validate_ip, assess_ip_target),
+}
+
+def build_record(assessment: dict, user_id) -> tuple:
+    # Returns the Assessment row mapping, including the stored report snapshot, and the report
+    created_at = datetime.utcnow()
+    report = generate_report({**assessment, "created_at": created_at})
+    snapshot, etag = pack_report(report)
+    return {**assessment, "user_id": user_id, "report_id": report["report_id"], "created_at": created_at, "report_snapshot": snapshot, "report_etag": etag}, report
+
+def dedupe_key(type: str, target: str) -> tuple:
+    return type, normalize_target(type, target)
+
+async def run_batch(targets: list, concurrency: int) -> list:
+    # targets is a list of (type, target) pairs; returns one result per unique target.
+    # Pipelines run on the normalized target; results echo the input as first submitted
+    # and list every input that was folded into them.
+    semaphore = asyncio.Semaphore(concurrency)
+    unique = {}
+    for type, target in targets:
+        unique.setdefault(dedupe_key(type, target), []).append(target)
+
+    async def run_one(type: str, target: str, inputs: list) -> dict:
+        result = {"type": type, "target": inputs[0], "inputs": inputs}
+        if type not in ASSESSORS:
+            return {**result, "success": False, "error": "Unsupported target type"}
+        validator, pipeline = ASSESSORS[type]
+        try:
+            validator(target)
+        except HTTPException as e:
+            return {**result, "success": False, "error": e.detail}
+        async with semaphore:
+            try:
+                return {**result, "success": True, "assessment": await pipeline(target)}
+            except Exception as e:
+                return {**result, "success": False, "error": str(e)}
+
+    return await asyncio.gather(*[run_one(type, target, inputs) for (type, target), inputs in unique.items()])
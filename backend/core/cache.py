@@ -0,0 +1,131 @@
+import json
+import time
+from collections import OrderedDict
+from utils.logger import logger
+
+_MISSING = object()
+
+class TTLCache:
+    """Size-bounded LRU mapping whose entries expire after a TTL."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl: float = None):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+class TwoTierCache:
+    """In-process LRU in front of a shared Redis tier.
+
+    Redis errors are logged and treated as misses so a Redis outage only
+    costs the provider round trip it would have saved. After a failure the
+    Redis tier is skipped for retry_interval seconds, so only one lookup
+    per interval waits on the socket timeout while Redis is down.
+    """
+
+    def __init__(self, namespace: str, maxsize: int, local_ttl: float, redis_ttl: int, negative_ttl: int, redis=None, retry_interval: float = 5.0):
+        self.namespace = namespace
+        self.local = TTLCache(maxsize, local_ttl)
+        self.redis_ttl = redis_ttl
+        self.negative_ttl = negative_ttl
+        self.retry_interval = retry_interval
+        self._redis = redis
+        self._redis_retry_at = 0.0
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def _key(self, key: str) -> str:
+        return f"cache:{self.namespace}:{key}"
+
+    @property
+    def redis_available(self) -> bool:
+        return self._redis is not None and time.monotonic() >= self._redis_retry_at
+
+    def _client(self):
+        return self._redis() if self.redis_available else None
+
+    def _redis_failed(self, action: str, e: Exception):
+        self._redis_retry_at = time.monotonic() + self.retry_interval
+        logger.warning(f"Redis cache {action} failed for {self.namespace}, using local tier for {self.retry_interval}s: {e}")
+
+    async def get(self, key: str):
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        client = self._client()
+        if client is not None:
+            try:
+                # PTTL comes back with the value so the local copy never outlives the shared one,
+                # which matters for short-lived negative entries
+                async with client.pipeline(transaction=False) as pipe:
+                    pipe.get(self._key(key))
+                    pipe.pttl(self._key(key))
+                    raw, pttl = await pipe.execute()
+            except Exception as e:
+                self._redis_failed("read", e)
+                raw = None
+            if raw is not None:
+                self.redis_hits += 1
+                value = json.loads(raw)
+                self.local.set(key, value, ttl=min(self.local.ttl, pttl / 1000) if pttl > 0 else None)
+                return value
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value, negative: bool = False):
+        local_ttl = min(self.local.ttl, self.negative_ttl) if negative else self.local.ttl
+        redis_ttl = min(self.redis_ttl, self.negative_ttl) if negative else self.redis_ttl
+        self.local.set(key, value, ttl=local_ttl)
+        client = self._client()
+        if client is not None:
+            try:
+                await client.set(self._key(key), json.dumps(value), px=int(redis_ttl * 1000))
+            except Exception as e:
+                self._redis_failed("write", e)
+
+    async def delete(self, key: str):
+        self.local.delete(key)
+        client = self._client()
+        if client is not None:
+            try:
+                await client.delete(self._key(key))
+            except Exception as e:
+                self._redis_failed("delete", e)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "local_hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+            "local_size": len(self.local),
+            "redis_available": self.redis_available,
+        }
@@ -1,8 +1,50 @@
-from sqlalchemy.orm import Session
-from db.database import CommunityThreat
-from datetime import datetime
+import hashlib
+import json
+from datetime import datetime, timezone
+from sqlalchemy import case, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.config import config
+from core.cache import TwoTierCache
+from core.community_index import community_index, SEVERITY_RANKS
+from core.redis_client import get_redis
+from core.security_apis import normalize_target
+from db.database import CommunityThreat, CommunityThreatRollup, CommunityThreatReporter
+from utils.pagination import encode_cursor
+from utils.logger import logger
 
-def report_threat(db: Session, user_id: str, target: str, type: str, threat_type: str, severity: str, details: dict):
+FEED_VERSION_KEY = "community:feed:version"
+FEED_COLUMNS = (CommunityThreat.id, CommunityThreat.target, CommunityThreat.type, CommunityThreat.threat_type, CommunityThreat.severity, CommunityThreat.reported_at)
+
+# Feed and rollup pages are cached under the current feed version; report_threat bumps it
+feed_cache = TwoTierCache(
+    "community_feed",
+    maxsize=config.COMMUNITY_FEED_CACHE_SIZE,
+    local_ttl=config.COMMUNITY_FEED_LOCAL_TTL,
+    redis_ttl=config.COMMUNITY_FEED_TTL,
+    negative_ttl=config.COMMUNITY_FEED_TTL,
+    redis=get_redis,
+    retry_interval=config.CACHE_REDIS_RETRY_INTERVAL,
+)
+_local_version = 0
+
+async def feed_version() -> str:
+    try:
+        return f"r{await get_redis().get(FEED_VERSION_KEY) or 0}"
+    except Exception as e:
+        logger.warning(f"Community feed version unavailable, using local version: {e}")
+        return f"l{_local_version}"
+
+async def bump_feed_version():
+    global _local_version
+    _local_version += 1
+    feed_cache.local.clear()
+    try:
+        await get_redis().incr(FEED_VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"Failed to bump community feed version: {e}")
+
+async def report_threat(db: AsyncSession, user_id: str, target: str, type: str, threat_type: str, severity: str, details: dict):
     threat = CommunityThreat(
         target=target,
         type=type,
@@ -13,9 +55,111 @@ def report_threat(db: Session, user_id: str, target: str, type: str, threat_type
         reported_at=datetime.utcnow()
     )
     db.add(threat)
-    db.commit()
-    db.refresh(threat)
+    severity_rank = await upsert_rollup(db, threat)
+    await db.commit()
+    await bump_feed_version()
+    await community_index.publish(threat.type, threat.target, severity_rank)
     return threat
 
-def get_community_threats(db: Session):
-    return db.query(CommunityThreat).all()
\ No newline at end of file
+async def upsert_rollup(db: AsyncSession, threat: CommunityThreat):
+    # Adds to the caller's transaction and returns the target's severity rank after the update;
+    # the reporter row makes reporter_count a distinct count
+    target = normalize_target(threat.type, threat.target)
+    new_reporter = False
+    if threat.reported_by:
+        new_reporter = (await db.execute(
+            insert(CommunityThreatReporter)
+            .values(target=target, type=threat.type, user_id=threat.reported_by)
+            .on_conflict_do_nothing()
+            .returning(CommunityThreatReporter.user_id)
+        )).first() is not None
+    stmt = insert(CommunityThreatRollup).values(
+        target=target,
+        type=threat.type,
+        report_count=1,
+        reporter_count=int(new_reporter),
+        max_severity=threat.severity,
+        severity_rank=SEVERITY_RANKS.get(threat.severity.lower(), 0),
+        first_seen=threat.reported_at,
+        last_seen=threat.reported_at,
+    )
+    rollup = CommunityThreatRollup
+    return (await db.execute(stmt.on_conflict_do_update(
+        index_elements=[rollup.target, rollup.type],
+        set_={
+            "report_count": rollup.report_count + 1,
+            "reporter_count": rollup.reporter_count + stmt.excluded.reporter_count,
+            "max_severity": case((stmt.excluded.severity_rank > rollup.severity_rank, stmt.excluded.max_severity), else_=rollup.max_severity),
+            "severity_rank": func.greatest(rollup.severity_rank, stmt.excluded.severity_rank),
+            "first_seen": func.least(rollup.first_seen, stmt.excluded.first_seen),
+            "last_seen": func.greatest(rollup.last_seen, stmt.excluded.last_seen),
+        },
+    ).returning(rollup.severity_rank))).scalar_one()
+
+def feed_query(type: str = None, severity: str = None, threat_type: str = None, since: datetime = None, cursor: tuple = None):
+    # Newest first on (reported_at, id), matching the ix_community_threats_* indexes
+    query = select(*FEED_COLUMNS)
+    if type:
+        query = query.where(CommunityThreat.type == type)
+    if severity:
+        query = query.where(CommunityThreat.severity == severity)
+    if threat_type:
+        query = query.where(CommunityThreat.threat_type == threat_type)
+    if since:
+        if since.tzinfo:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        query = query.where(CommunityThreat.reported_at >= since)
+    if cursor:
+        query = query.where(tuple_(CommunityThreat.reported_at, CommunityThreat.id) < tuple_(*cursor))
+    return query.order_by(CommunityThreat.reported_at.desc(), CommunityThreat.id.desc())
+
+async def get_community_threats(db: AsyncSession, limit: int, cursor: tuple = None, **filters) -> dict:
+    rows = (await db.execute(feed_query(cursor=cursor, **filters).limit(limit + 1))).all()
+    threats, has_next = rows[:limit], len(rows) > limit
+    return {
+        "threats": [{"id": str(t.id), "target": t.target, "type": t.type, "threat_type": t.threat_type, "severity": t.severity, "reported_at": t.reported_at.isoformat()} for t in threats],
+        "pagination": {
+            "has_next": has_next,
+            "next_cursor": encode_cursor(threats[-1].reported_at, threats[-1].id) if has_next else None,
+        },
+    }
+
+async def get_community_rollups(db: AsyncSession, limit: int, cursor: tuple = None, type: str = None, target: str = None, min_severity: str = None) -> dict:
+    rollup = CommunityThreatRollup
+    query = select(rollup)
+    if type:
+        query = query.where(rollup.type == type)
+    if target:
+        query = query.where(rollup.target == (normalize_target(type, target) if type else target.strip()))
+    if min_severity:
+        query = query.where(rollup.severity_rank >= SEVERITY_RANKS.get(min_severity.lower(), 0))
+    if cursor:
+        query = query.where(tuple_(rollup.last_seen, rollup.id) < tuple_(*cursor))
+    rows = (await db.execute(query.order_by(rollup.last_seen.desc(), rollup.id.desc()).limit(limit + 1))).scalars().all()
+    rollups, has_next = rows[:limit], len(rows) > limit
+    return {
+        "rollups": [{
+            "target": r.target,
+            "type": r.type,
+            "report_count": r.report_count,
+            "reporter_count": r.reporter_count,
+            "max_severity": r.max_severity,
+            "first_seen": r.first_seen.isoformat(),
+            "last_seen": r.last_seen.isoformat(),
+        } for r in rollups],
+        "pagination": {
+            "has_next": has_next,
+            "next_cursor": encode_cursor(rollups[-1].last_seen, rollups[-1].id) if has_next else None,
+        },
+    }
+
+async def cached_page(kind: str, params: dict, load) -> dict:
+    # Returns {"etag", "data"}; params are the raw query parameters that shape the page
+    key = f"{kind}:{await feed_version()}:{hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()}"
+    cached = await feed_cache.get(key)
+    if cached is not None:
+        return cached
+    data = await load()
+    page = {"etag": f'"{hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()}"', "data": data}
+    await feed_cache.set(key, page)
+    return page
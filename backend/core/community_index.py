@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import json
+import math
+from sqlalchemy import select
+from config.config import config
+from core.redis_client import get_redis
+from core.security_apis import normalize_target, normalize_host
+from db.database import AsyncSessionLocal, CommunityThreatRollup
+from utils.logger import logger
+
+UPDATES_CHANNEL = "community_index:updates"
+SEVERITY_RANKS = {"low": 1, "medium": 2, "high": 3, "critical": 4}
+SEVERITY_NAMES = {rank: name for name, rank in SEVERITY_RANKS.items()}
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing of one blake2b digest."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(1, capacity)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+class CommunityIndex:
+    """In-process map of community-reported targets to their highest severity rank.
+
+    Loaded from community_threat_rollups at startup and kept current from
+    report_threat (locally and over Redis pub/sub), so scoring never needs
+    a query. The Bloom filter answers the common "never reported" case
+    without touching the map.
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.01):
+        self.error_rate = error_rate
+        self._severity = {}
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._listener = None
+        self._stopping = False
+        self.lookups = 0
+        self.bloom_rejections = 0
+        self.matches = 0
+
+    @staticmethod
+    def _key(type: str, target: str) -> str:
+        return f"{type}\0{target}"
+
+    def add(self, type: str, target: str, severity_rank: int):
+        key = self._key(type, normalize_target(type, target))
+        if severity_rank <= self._severity.get(key, 0):
+            return
+        self._severity[key] = severity_rank
+        if len(self._severity) > self._bloom.capacity:
+            self._rebuild(self._bloom.capacity * 2)
+        else:
+            self._bloom.add(key)
+
+    def _rebuild(self, capacity: int):
+        bloom = BloomFilter(capacity, self.error_rate)
+        for key in self._severity:
+            bloom.add(key)
+        self._bloom = bloom
+
+    def lookup(self, type: str, target: str) -> int:
+        # Highest reported severity rank for the target (0 when never reported);
+        # URLs also match reports filed against their host
+        self.lookups += 1
+        candidates = [normalize_target(type, target)]
+        if type == "url":
+            candidates.append(normalize_host(target))
+        rank = 0
+        for candidate in candidates:
+            key = self._key(type, candidate)
+            if key not in self._bloom:
+                self.bloom_rejections += 1
+                continue
+            rank = max(rank, self._severity.get(key, 0))
+        if rank:
+            self.matches += 1
+        return rank
+
+    async def load(self):
+        severity = {}
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(select(CommunityThreatRollup.type, CommunityThreatRollup.target, CommunityThreatRollup.severity_rank))
+            async for type, target, rank in result:
+                severity[self._key(type, target)] = rank
+        self._severity = severity
+        self._rebuild(max(self._bloom.capacity, len(severity) * 2))
+        logger.info(f"Community index loaded with {len(severity)} targets")
+
+    async def publish(self, type: str, target: str, severity_rank: int):
+        self.add(type, target, severity_rank)
+        try:
+            await get_redis().publish(UPDATES_CHANNEL, json.dumps({"type": type, "target": target, "severity_rank": severity_rank}))
+        except Exception as e:
+            logger.warning(f"Failed to publish community index update: {e}")
+
+    async def _listen(self):
+        while not self._stopping:
+            pubsub = get_redis().pubsub()
+            try:
+                await pubsub.subscribe(UPDATES_CHANNEL)
+                while not self._stopping:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None:
+                        update = json.loads(message["data"])
+                        self.add(update["type"], update["target"], update["severity_rank"])
+            except Exception as e:
+                # Updates published while disconnected are lost; reload once back
+                logger.warning(f"Community index listener disconnected: {e}")
+                await asyncio.sleep(config.COMMUNITY_INDEX_RESUBSCRIBE_DELAY)
+                try:
+                    await self.load()
+                except Exception as e:
+                    logger.error(f"Community index reload failed: {e}")
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+    async def start(self):
+        try:
+            await self.load()
+        except Exception as e:
+            logger.error(f"Community index load failed; scoring without community intel: {e}")
+        if self._listener is None:
+            self._stopping = False
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._stopping = True
+            try:
+                await asyncio.wait_for(self._listener, timeout=config.COMMUNITY_INDEX_RESUBSCRIBE_DELAY + 2)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+            self._listener = None
+
+    def stats(self) -> dict:
+        return {
+            "targets": len(self._severity),
+            "bloom_bits": self._bloom.size,
+            "lookups": self.lookups,
+            "bloom_rejections": self.bloom_rejections,
+            "matches": self.matches,
+        }
+
+community_index = CommunityIndex(config.COMMUNITY_INDEX_CAPACITY, config.COMMUNITY_INDEX_ERROR_RATE)
@@ -0,0 +1,38 @@
+import aiohttp
+from config.config import config
+from utils.logger import logger
+
+# Process-wide HTTP client shared by all outbound provider calls
+_session: aiohttp.ClientSession = None
+
+def _build_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=config.HTTP_POOL_LIMIT,
+        limit_per_host=config.HTTP_POOL_LIMIT_PER_HOST,
+        ttl_dns_cache=config.HTTP_DNS_CACHE_TTL,
+        use_dns_cache=True,
+        keepalive_timeout=config.HTTP_KEEPALIVE_TIMEOUT,
+    )
+    timeout = aiohttp.ClientTimeout(total=config.HTTP_TIMEOUT, connect=config.HTTP_CONNECT_TIMEOUT)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+async def init_http_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = _build_session()
+        logger.info("Shared HTTP session created")
+    return _session
+
+async def close_http_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+        logger.info("Shared HTTP session closed")
+    _session = None
+
+def get_http_session() -> aiohttp.ClientSession:
+    # Scripts and workers that skip the app lifespan get a session on first use
+    global _session
+    if _session is None or _session.closed:
+        _session = _build_session()
+    return _session
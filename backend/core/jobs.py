@@ -0,0 +1,251 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime
+from redis.exceptions import RedisError
+from config.config import config
+from core.assessment import ASSESSORS, build_record
+from core.cache import TTLCache
+from core.notifications import notification_queue
+from core.quotas import release_quota
+from core.write_behind import assessment_writer
+from core.redis_client import get_redis, pipeline
+from db.database import AsyncSessionLocal
+from utils.logger import logger
+
+TERMINAL_STATUSES = ("completed", "failed")
+QUEUE_KEY = "jobs:queue"
+WORKERS_KEY = "jobs:workers"
+RETRY_DELAY = 1  # seconds to back off after a Redis error
+
+def _job_key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+def _processing_key(worker_id: str) -> str:
+    return f"jobs:processing:{worker_id}"
+
+def _heartbeat_key(worker_id: str) -> str:
+    return f"jobs:worker:{worker_id}"
+
+def public_job(job: dict) -> dict:
+    return {k: v for k, v in job.items() if k not in ("user_id", "user_email", "quota_reserved")}
+
+async def execute_job(job: dict) -> dict:
+    # Same pipeline as the synchronous /api/assess/* endpoints
+    _, pipeline = ASSESSORS[job["type"]]
+    assessment = await pipeline(job["target"])
+    record, report = build_record(assessment, uuid.UUID(job["user_id"]))
+    async with AsyncSessionLocal() as db:
+        await assessment_writer.write(db, [record])
+    await notification_queue.enqueue(job["user_email"], assessment)
+    return {**assessment, "report_id": report["report_id"], "timestamp": report["created_at"]}
+
+class JobQueue:
+    """Assessment job queue backed by Redis, with an in-process fallback.
+
+    With Redis, jobs are pushed to a list drained by worker.py processes.
+    Each worker moves a job id into its own processing list while it runs
+    and removes it when done; the lists of workers whose heartbeat has
+    expired are pushed back onto the queue, so a crash mid-job means the
+    job is retried rather than stuck. Without Redis, jobs live in a local
+    TTL map and are drained by worker tasks running inside the API process.
+    """
+
+    def __init__(self):
+        self.use_redis = False
+        self.worker_id = uuid.uuid4().hex
+        self._heartbeat = None
+        self._local_jobs = TTLCache(config.JOB_LOCAL_MAX, config.JOB_TTL)
+        self._local_queue = None
+        self._local_workers = []
+
+    async def connect(self, start_local_workers: bool = True):
+        try:
+            await get_redis().ping()
+            self.use_redis = True
+        except Exception as e:
+            logger.warning(f"Job queue falling back to in-process workers: {e}")
+            self.use_redis = False
+            self._local_queue = asyncio.Queue()
+            if start_local_workers:
+                self._local_workers = [asyncio.create_task(self.work()) for _ in range(config.JOB_LOCAL_WORKERS)]
+
+    async def close(self):
+        for task in self._local_workers:
+            task.cancel()
+        await asyncio.gather(*self._local_workers, return_exceptions=True)
+        self._local_workers = []
+
+    async def _save(self, job: dict):
+        job["updated_at"] = datetime.utcnow().isoformat()
+        if self.use_redis:
+            await get_redis().set(_job_key(job["id"]), json.dumps(job), ex=config.JOB_TTL)
+        else:
+            self._local_jobs.set(job["id"], job)
+
+    async def get(self, job_id: str) -> dict:
+        if self.use_redis:
+            raw = await get_redis().get(_job_key(job_id))
+            return json.loads(raw) if raw else None
+        job = self._local_jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def enqueue(self, type: str, target: str, user_id, user_email: str, quota_reserved: int = 0) -> dict:
+        job = {
+            "id": uuid.uuid4().hex,
+            "type": type,
+            "target": target,
+            "status": "queued",
+            "user_id": str(user_id),
+            "user_email": user_email,
+            "quota_reserved": quota_reserved,
+            "created_at": datetime.utcnow().isoformat(),
+            "result": None,
+            "error": None,
+        }
+        if self.use_redis:
+            # Store the job and queue its id atomically in one round trip
+            job["updated_at"] = job["created_at"]
+            async with pipeline(transaction=True) as pipe:
+                pipe.set(_job_key(job["id"]), json.dumps(job), ex=config.JOB_TTL)
+                pipe.lpush(QUEUE_KEY, job["id"])
+                await pipe.execute()
+        else:
+            await self._save(job)
+            self._local_queue.put_nowait(job["id"])
+        return job
+
+    async def register_worker(self):
+        # Called by worker.py before consuming: recover jobs from dead workers, then start heartbeating
+        redis = get_redis()
+        await redis.set(_heartbeat_key(self.worker_id), 1, ex=config.JOB_WORKER_HEARTBEAT_TTL)
+        await redis.sadd(WORKERS_KEY, self.worker_id)
+        await self.requeue_stale()
+        self._heartbeat = asyncio.create_task(self._beat())
+
+    async def unregister_worker(self):
+        # Jobs interrupted by shutdown go back on the queue for another worker
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+            self._heartbeat = None
+        redis = get_redis()
+        requeued = await self._requeue(self.worker_id)
+        if requeued:
+            logger.warning(f"Requeued {requeued} interrupted jobs on shutdown")
+        await redis.delete(_heartbeat_key(self.worker_id))
+
+    async def _beat(self):
+        while True:
+            await asyncio.sleep(config.JOB_WORKER_HEARTBEAT_TTL / 3)
+            try:
+                # Re-register too, in case a missed beat got this worker's list recovered by another
+                async with pipeline() as pipe:
+                    pipe.set(_heartbeat_key(self.worker_id), 1, ex=config.JOB_WORKER_HEARTBEAT_TTL)
+                    pipe.sadd(WORKERS_KEY, self.worker_id)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Job worker heartbeat failed: {e}")
+
+    async def requeue_stale(self) -> int:
+        redis = get_redis()
+        requeued = 0
+        for worker_id in await redis.smembers(WORKERS_KEY):
+            if worker_id != self.worker_id and not await redis.exists(_heartbeat_key(worker_id)):
+                requeued += await self._requeue(worker_id)
+        if requeued:
+            logger.warning(f"Requeued {requeued} jobs left behind by dead workers")
+        return requeued
+
+    async def _requeue(self, worker_id: str) -> int:
+        # LMOVE is atomic, so concurrent recoveries never duplicate a job; requeued jobs go to the front
+        redis = get_redis()
+        requeued = 0
+        while await redis.lmove(_processing_key(worker_id), QUEUE_KEY, "RIGHT", "RIGHT") is not None:
+            requeued += 1
+        await redis.srem(WORKERS_KEY, worker_id)
+        return requeued
+
+    async def _next_job_id(self) -> str:
+        if self.use_redis:
+            return await get_redis().blmove(QUEUE_KEY, _processing_key(self.worker_id), config.JOB_POLL_TIMEOUT, "RIGHT", "LEFT")
+        return await self._local_queue.get()
+
+    async def _ack(self, job_id: str):
+        if self.use_redis:
+            await get_redis().lrem(_processing_key(self.worker_id), 1, job_id)
+
+    async def work(self):
+        while True:
+            try:
+                job_id = await self._next_job_id()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job queue read failed: {e}")
+                await asyncio.sleep(RETRY_DELAY)
+                continue
+            if job_id is None:
+                continue
+            try:
+                await self._process(job_id)
+            except RedisError as e:
+                # Losing Redis mid-job must not take the other consumers down with this one
+                logger.error(f"Job {job_id} bookkeeping failed: {e}")
+                await asyncio.sleep(RETRY_DELAY)
+                await self._return_to_queue(job_id)
+
+    async def _return_to_queue(self, job_id: str):
+        # Hand the job to the next free worker; if Redis is still down it stays in this
+        # worker's processing list and is recovered from there after a restart
+        try:
+            async with pipeline(transaction=True) as pipe:
+                pipe.lrem(_processing_key(self.worker_id), 1, job_id)
+                pipe.rpush(QUEUE_KEY, job_id)
+                await pipe.execute()
+        except RedisError as e:
+            logger.error(f"Could not requeue job {job_id}, leaving it for recovery: {e}")
+
+    async def _process(self, job_id: str):
+        job = await self.get(job_id)
+        if job is None or job["status"] in TERMINAL_STATUSES:
+            await self._ack(job_id)
+            return
+        job["attempts"] = job.get("attempts", 0) + 1
+        if job["attempts"] > config.JOB_MAX_ATTEMPTS:
+            # Keeps a job that takes its worker down from crashing workers forever
+            job["error"] = f"Job abandoned after {config.JOB_MAX_ATTEMPTS} interrupted attempts"
+            job["status"] = "failed"
+            await self._save(job)
+            await release_quota(job["user_id"], job.get("quota_reserved", 0))
+            await self._ack(job_id)
+            return
+        job["status"] = "running"
+        await self._save(job)
+        try:
+            job["result"] = await execute_job(job)
+            job["status"] = "completed"
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            job["error"] = str(e)
+            job["status"] = "failed"
+            await release_quota(job["user_id"], job.get("quota_reserved", 0))
+        await self._save(job)
+        await self._ack(job_id)
+
+    async def events(self, job_id: str):
+        # Server-Sent Events stream emitting the job on every status change
+        last_status = None
+        while True:
+            job = await self.get(job_id)
+            if job is None:
+                yield "event: error\ndata: {\"detail\": \"Job not found\"}\n\n"
+                return
+            if job["status"] != last_status:
+                last_status = job["status"]
+                yield f"event: {last_status}\ndata: {json.dumps(public_job(job))}\n\n"
+            if last_status in TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(config.JOB_EVENTS_POLL_INTERVAL)
+
+job_queue = JobQueue()
@@ -1,25 +1,208 @@
+import asyncio
+import json
 import smtplib
+import time
 from email.mime.text import MIMEText
 from config.config import config
+from core.redis_client import get_redis
 from utils.logger import logger
 
-def send_notification(email: str, assessment: dict):
-    try:
-        msg = MIMEText(
+QUEUE_KEY = "notifications:queue"
+
+def build_message(email: str, assessment: dict) -> dict:
+    return {
+        "to": email,
+        "subject": f"CyberShield Lite: Assessment Result for {assessment['target']}",
+        "body": (
             f"Assessment Result for {assessment['target']}:\n"
             f"Type: {assessment['type']}\n"
             f"Score: {assessment['score']}\n"
             f"Status: {assessment['status']}\n"
             f"Threats: {', '.join(assessment['threats']) if assessment['threats'] else 'None'}"
-        )
-        msg["Subject"] = f"CyberShield Lite: Assessment Result for {assessment['target']}"
-        msg["From"] = config.SMTP_USER
-        msg["To"] = email
-
-        with smtplib.SMTP(config.SMTP_HOST, config.SMTP_PORT) as server:
-            server.starttls()
-            server.login(config.SMTP_USER, config.SMTP_PASS)
-            server.sendmail(config.SMTP_USER, email, msg.as_string())
+        ),
+    }
+
+def _mime(message: dict) -> MIMEText:
+    msg = MIMEText(message["body"])
+    msg["Subject"] = message["subject"]
+    msg["From"] = config.SMTP_USER
+    msg["To"] = message["to"]
+    return msg
+
+def _open_smtp() -> smtplib.SMTP:
+    server = smtplib.SMTP(config.SMTP_HOST, config.SMTP_PORT, timeout=config.NOTIFY_SMTP_TIMEOUT)
+    if config.SMTP_USE_TLS:
+        server.starttls()
+    if config.SMTP_USER and config.SMTP_PASS:
+        server.login(config.SMTP_USER, config.SMTP_PASS)
+    return server
+
+def send_notification(email: str, assessment: dict):
+    # Direct one-shot delivery; request handlers go through notification_queue instead
+    try:
+        message = build_message(email, assessment)
+        with _open_smtp() as server:
+            server.sendmail(config.SMTP_USER, email, _mime(message).as_string())
         logger.info(f"Notification sent to {email}")
     except Exception as e:
-        logger.error(f"Failed to send notification to {email}: {e}")
\ No newline at end of file
+        logger.error(f"Failed to send notification to {email}: {e}")
+
+class SMTPConnection:
+    """Long-lived authenticated SMTP connection owned by one delivery worker."""
+
+    def __init__(self):
+        self._server = None
+        self._last_used = 0.0
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._server is not None and time.monotonic() - self._last_used > config.NOTIFY_SMTP_IDLE_CHECK:
+            # Servers drop idle sessions; probe before reusing an old one
+            try:
+                self._server.noop()
+            except (smtplib.SMTPException, OSError):
+                self.close()
+        if self._server is None:
+            self._server = _open_smtp()
+        return self._server
+
+    def send(self, message: dict):
+        try:
+            self._connection().sendmail(config.SMTP_USER, message["to"], _mime(message).as_string())
+        except (smtplib.SMTPServerDisconnected, OSError):
+            self.close()
+            raise
+        finally:
+            self._last_used = time.monotonic()
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+class NotificationQueue:
+    """Background notification delivery.
+
+    Messages are buffered in memory (bounded) or in a Redis list and
+    drained by worker tasks, each holding its own SMTP connection. Failed
+    sends are retried with exponential backoff.
+    """
+
+    def __init__(self):
+        self.use_redis = False
+        self.started = False
+        self._queue = None
+        self._workers = []
+        self._connections = []
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.dropped = 0
+
+    async def start(self):
+        if self.started:
+            return
+        if config.NOTIFY_QUEUE_BACKEND == "redis":
+            try:
+                await get_redis().ping()
+                self.use_redis = True
+            except Exception as e:
+                logger.warning(f"Notification queue falling back to memory: {e}")
+        self._queue = asyncio.Queue(maxsize=config.NOTIFY_QUEUE_MAX)
+        self._connections = [SMTPConnection() for _ in range(config.NOTIFY_WORKERS)]
+        self._workers = [asyncio.create_task(self._work(conn)) for conn in self._connections]
+        self.started = True
+
+    async def stop(self):
+        if not self.started:
+            return
+        # Give in-memory messages (including ones mid-retry) a chance to go out before shutdown
+        try:
+            await asyncio.wait_for(self._queue.join(), config.NOTIFY_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self._queue.qsize()} undelivered notifications on shutdown")
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        for conn in self._connections:
+            await asyncio.to_thread(conn.close)
+        self._workers, self._connections = [], []
+        self.started = False
+
+    async def enqueue(self, email: str, assessment: dict):
+        message = build_message(email, assessment)
+        if not self.started:
+            asyncio.get_running_loop().run_in_executor(None, send_notification, email, assessment)
+            return
+        if self.use_redis:
+            try:
+                await get_redis().lpush(QUEUE_KEY, json.dumps(message))
+                return
+            except Exception as e:
+                logger.warning(f"Redis notification enqueue failed, buffering in memory: {e}")
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.error(f"Notification queue full; dropping notification to {email}")
+
+    async def _next(self) -> tuple:
+        # Returns (message, from_memory); the memory buffer also holds Redis enqueue overflow
+        if self.use_redis and self._queue.empty():
+            try:
+                item = await get_redis().brpop(QUEUE_KEY, timeout=config.NOTIFY_POLL_TIMEOUT)
+            except Exception as e:
+                logger.error(f"Notification queue read failed: {e}")
+                await asyncio.sleep(1)
+                return None, False
+            return (json.loads(item[1]) if item else None), False
+        return await self._queue.get(), True
+
+    async def _deliver(self, conn: SMTPConnection, message: dict):
+        for attempt in range(config.NOTIFY_MAX_RETRIES + 1):
+            try:
+                await asyncio.to_thread(conn.send, message)
+                self.sent += 1
+                logger.info(f"Notification sent to {message['to']}")
+                return
+            except Exception as e:
+                if attempt == config.NOTIFY_MAX_RETRIES:
+                    self.failed += 1
+                    logger.error(f"Failed to send notification to {message['to']}: {e}")
+                    return
+                self.retried += 1
+                await asyncio.sleep(config.NOTIFY_RETRY_BASE_DELAY * 2 ** attempt)
+
+    async def _work(self, conn: SMTPConnection):
+        while True:
+            message, from_memory = await self._next()
+            if message is None:
+                continue
+            try:
+                await self._deliver(conn, message)
+            finally:
+                if from_memory:
+                    self._queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis" if self.use_redis else "memory",
+            "workers": len(self._workers),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "dropped": self.dropped,
+        }
+
+    async def depth(self) -> int:
+        depth = self._queue.qsize() if self._queue else 0
+        if self.use_redis:
+            try:
+                depth += await get_redis().llen(QUEUE_KEY)
+            except Exception:
+                pass
+        return depth
+
+notification_queue = NotificationQueue()
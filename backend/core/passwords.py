@@ -0,0 +1,56 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from config.config import config
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# bcrypt releases the GIL, so a small dedicated pool keeps hashing off the event loop
+_executor: ThreadPoolExecutor = None
+_pending = 0
+_rejected = 0
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=config.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+    return _executor
+
+def _release():
+    global _pending
+    _pending -= 1
+
+def _on_done(loop, _future):
+    # Runs in the worker thread; hand the decrement to the event loop
+    try:
+        loop.call_soon_threadsafe(_release)
+    except RuntimeError:
+        pass  # loop already closed
+
+async def _run(fn, *args):
+    global _pending, _rejected
+    if _pending >= config.PASSWORD_HASH_MAX_PENDING:
+        _rejected += 1
+        raise HTTPException(status_code=503, detail="Authentication service busy, please retry", headers={"Retry-After": "1"})
+    # A job counts until its thread is done with it, even if the waiting request is cancelled first
+    future = _get_executor().submit(fn, *args)
+    _pending += 1
+    future.add_done_callback(functools.partial(_on_done, asyncio.get_running_loop()))
+    return await asyncio.wrap_future(future)
+
+async def hash_password(password: str) -> str:
+    return await _run(pwd_context.hash, password)
+
+async def verify_password(password: str, password_hash: str) -> bool:
+    return await _run(pwd_context.verify, password, password_hash)
+
+def stats() -> dict:
+    return {"workers": config.PASSWORD_HASH_WORKERS, "pending": _pending, "max_pending": config.PASSWORD_HASH_MAX_PENDING, "rejected": _rejected}
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,148 @@
+import calendar
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.config import config
+from core.redis_client import get_redis, pipeline
+from db.database import UsageRollup
+from utils.logger import logger
+
+# Check-and-reserve against both counters in one atomic step, so concurrent
+# requests can't all pass the check before any of them is counted. Limits
+# below zero are unlimited. Returns 0 when reserved, 1 or 2 for the period
+# (day, month) that would be exceeded, and -1 when a counter needs priming.
+RESERVE_SCRIPT = """
+local count = tonumber(ARGV[1])
+for i, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 0 then
+        return -1
+    end
+end
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[i + 1])
+    if limit >= 0 and tonumber(redis.call('GET', key)) + count > limit then
+        return i
+    end
+end
+for i, key in ipairs(KEYS) do
+    redis.call('INCRBY', key, count)
+end
+return 0
+"""
+
+# Adjust only counters that are already primed; a missing key is rebuilt
+# from usage_rollups on the next read instead of restarting from zero.
+INCREMENT_IF_EXISTS_SCRIPT = """
+for i, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        redis.call('INCRBY', key, ARGV[1])
+    end
+end
+return 1
+"""
+
+EXCEEDED = {1: "Daily scan quota exceeded", 2: "Monthly scan quota exceeded"}
+
+def _periods(now: datetime) -> dict:
+    # period -> (redis key suffix, unix expiry a day after the period ends)
+    day_end = datetime(now.year, now.month, now.day) + timedelta(days=1)
+    month_end = datetime(now.year, now.month, 1) + timedelta(days=calendar.monthrange(now.year, now.month)[1])
+    return {
+        "day": (now.strftime("%Y%m%d"), calendar.timegm((day_end + timedelta(days=1)).timetuple())),
+        "month": (now.strftime("%Y%m"), calendar.timegm((month_end + timedelta(days=1)).timetuple())),
+    }
+
+def _key(user_id, period: str, suffix: str) -> str:
+    return f"quota:{user_id}:{period}:{suffix}"
+
+async def _usage_from_rollups(db: AsyncSession, user_id, now: datetime) -> dict:
+    today = now.date()
+    rows = (await db.execute(
+        select(UsageRollup.day, UsageRollup.scans).where(UsageRollup.user_id == user_id, UsageRollup.day >= today.replace(day=1), UsageRollup.day <= today)
+    )).all()
+    return {"day": sum(r.scans for r in rows if r.day == today), "month": sum(r.scans for r in rows)}
+
+async def _prime(db: AsyncSession, user_id, now: datetime) -> dict:
+    # Seed missing counters from the durable rollup; NX keeps counters other requests already primed
+    usage = await _usage_from_rollups(db, user_id, now)
+    try:
+        async with pipeline() as pipe:
+            for period, (suffix, expire_at) in _periods(now).items():
+                pipe.set(_key(user_id, period, suffix), usage[period], nx=True, exat=expire_at)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to prime quota counters: {e}")
+    return usage
+
+async def get_usage(db: AsyncSession, user_id) -> dict:
+    now = datetime.utcnow()
+    try:
+        async with pipeline() as pipe:
+            for period, (suffix, _) in _periods(now).items():
+                pipe.get(_key(user_id, period, suffix))
+            day, month = await pipe.execute()
+        if day is not None and month is not None:
+            return {"scans_today": int(day), "scans_this_month": int(month)}
+    except Exception as e:
+        logger.warning(f"Quota counters unavailable, reading usage_rollups: {e}")
+        usage = await _usage_from_rollups(db, user_id, now)
+        return {"scans_today": usage["day"], "scans_this_month": usage["month"]}
+    usage = await _prime(db, user_id, now)
+    return {"scans_today": usage["day"], "scans_this_month": usage["month"]}
+
+async def enforce_quota(db: AsyncSession, user, count: int = 1) -> int:
+    # Reserves count scans against the user's counters and returns how many were reserved;
+    # hand that back with release_quota if the scans don't happen
+    limits = config.PREMIUM_LIMITS if user.plan == "premium" else config.FREE_LIMITS
+    now = datetime.utcnow()
+    keys = [_key(user.id, period, suffix) for period, (suffix, _) in _periods(now).items()]
+    try:
+        for _ in range(2):
+            result = await get_redis().eval(RESERVE_SCRIPT, len(keys), *keys, count, limits["scans_per_day"], limits["scans_per_month"])
+            if result == -1:
+                await _prime(db, user.id, now)
+                continue
+            if result in EXCEEDED:
+                raise HTTPException(status_code=429, detail=EXCEEDED[result])
+            return count
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.warning(f"Quota counters unavailable, checking usage_rollups: {e}")
+    # Without counters the check can't be atomic; the rollup still bounds usage to committed scans
+    usage = await _usage_from_rollups(db, user.id, now)
+    if 0 <= limits["scans_per_day"] < usage["day"] + count:
+        raise HTTPException(status_code=429, detail=EXCEEDED[1])
+    if 0 <= limits["scans_per_month"] < usage["month"] + count:
+        raise HTTPException(status_code=429, detail=EXCEEDED[2])
+    return 0
+
+async def release_quota(user_id, count: int):
+    if count <= 0:
+        return
+    keys = [_key(user_id, period, suffix) for period, (suffix, _) in _periods(datetime.utcnow()).items()]
+    try:
+        await get_redis().eval(INCREMENT_IF_EXISTS_SCRIPT, len(keys), *keys, -count)
+    except Exception as e:
+        logger.warning(f"Failed to release quota reservation: {e}")
+
+@asynccontextmanager
+async def reserve_quota(db: AsyncSession, user, count: int = 1):
+    # Yields the number reserved; the reservation is returned if the block raises
+    reserved = await enforce_quota(db, user, count)
+    try:
+        yield reserved
+    except BaseException:
+        await release_quota(user.id, reserved)
+        raise
+
+async def record_scans(db: AsyncSession, user_id, count: int = 1):
+    # Adds to the caller's transaction; the Redis counters were already charged by enforce_quota
+    stmt = insert(UsageRollup).values(user_id=user_id, day=datetime.utcnow().date(), scans=count)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[UsageRollup.user_id, UsageRollup.day],
+        set_={"scans": UsageRollup.scans + stmt.excluded.scans, "updated_at": func.now()},
+    ))
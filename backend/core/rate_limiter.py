@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import math
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from redis.exceptions import NoScriptError, RedisError
+from utils.logger import logger
+
+# Fixed window: INCR and first-hit expiry in one atomic step. Also repairs
+# keys left without a TTL, which would otherwise block a user forever.
+FIXED_WINDOW_SCRIPT = """
+local current = redis.call('INCR', KEYS[1])
+local ttl = redis.call('PTTL', KEYS[1])
+if ttl < 0 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    ttl = tonumber(ARGV[2])
+end
+local limit = tonumber(ARGV[1])
+if current > limit then
+    return {0, 0, ttl}
+end
+return {1, limit - current, ttl}
+"""
+
+# Sliding window log: one sorted-set member per accepted request, scored by
+# server time in milliseconds. Rejected requests are not recorded.
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local count = redis.call('ZCARD', KEYS[1])
+local allowed = 0
+if count < limit then
+    redis.call('ZADD', KEYS[1], now, ARGV[3])
+    redis.call('PEXPIRE', KEYS[1], window)
+    count = count + 1
+    allowed = 1
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+local reset = window
+if oldest[2] then
+    reset = tonumber(oldest[2]) + window - now
+end
+return {allowed, limit - count, reset}
+"""
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: float  # seconds until the window frees up
+
+    def headers(self) -> dict:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(max(0, self.remaining)),
+            "X-RateLimit-Reset": str(math.ceil(self.reset)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.reset)))
+        return headers
+
+class RedisRateLimiter:
+    """Check-and-increment in a single EVALSHA round trip."""
+
+    def __init__(self, get_client, algorithm: str = "fixed_window"):
+        if algorithm not in ("fixed_window", "sliding_window"):
+            raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self._get_client = get_client
+        self._source = SLIDING_WINDOW_SCRIPT if algorithm == "sliding_window" else FIXED_WINDOW_SCRIPT
+        self._sha = hashlib.sha1(self._source.encode()).hexdigest()
+
+    async def _eval(self, key: str, *args):
+        client = self._get_client()
+        try:
+            return await client.evalsha(self._sha, 1, key, *args)
+        except NoScriptError:
+            # EVAL also caches the script server-side for the next EVALSHA
+            return await client.eval(self._source, 1, key, *args)
+
+    async def hit(self, key: str, limit: int, window: int) -> RateLimitResult:
+        if self.algorithm == "sliding_window":
+            allowed, remaining, reset_ms = await self._eval(f"{key}:log", limit, window * 1000, uuid.uuid4().hex)
+        else:
+            allowed, remaining, reset_ms = await self._eval(key, limit, window * 1000)
+        return RateLimitResult(bool(allowed), limit, int(remaining), int(reset_ms) / 1000)
+
+class LocalTokenBucketLimiter:
+    """Per-process token buckets used while Redis is unreachable.
+
+    State per key is a (tokens, last_seen) tuple kept in LRU order, so idle
+    keys are evicted from the front and the map never exceeds max_keys.
+    """
+
+    def __init__(self, max_keys: int, idle_ttl: float):
+        self.max_keys = max_keys
+        self.idle_ttl = idle_ttl
+        self._buckets = OrderedDict()
+
+    def _evict(self, now: float):
+        while self._buckets:
+            key, (_, last_seen) = next(iter(self._buckets.items()))
+            if len(self._buckets) <= self.max_keys and now - last_seen < self.idle_ttl:
+                break
+            del self._buckets[key]
+
+    def hit(self, key: str, limit: int, window: int) -> RateLimitResult:
+        now = time.monotonic()
+        rate = limit / window
+        tokens, last_seen = self._buckets.pop(key, (float(limit), now))
+        tokens = min(float(limit), tokens + (now - last_seen) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        self._evict(now)
+        reset = (limit - tokens) / rate if allowed else (1 - tokens) / rate
+        return RateLimitResult(allowed, limit, int(tokens), reset)
+
+    def __len__(self):
+        return len(self._buckets)
+
+class FailoverRateLimiter:
+    """Redis-backed limiter that falls back to local token buckets.
+
+    A failed Redis call switches to the local limiter; a background task
+    pings Redis and switches back once it answers again.
+    """
+
+    def __init__(self, get_client, algorithm: str, max_local_keys: int, local_idle_ttl: float, reconnect_interval: float, redis_available: bool = True):
+        self._get_client = get_client
+        self.redis = RedisRateLimiter(get_client, algorithm)
+        self.local = LocalTokenBucketLimiter(max_local_keys, local_idle_ttl)
+        self.redis_available = redis_available
+        self.reconnect_interval = reconnect_interval
+        self._monitor = None
+
+    async def hit(self, key: str, limit: int, window: int) -> RateLimitResult:
+        if self.redis_available:
+            try:
+                return await self.redis.hit(key, limit, window)
+            except RedisError as e:
+                logger.warning(f"Redis rate limiter unavailable, using local token buckets: {e}")
+                self.redis_available = False
+        return self.local.hit(key, limit, window)
+
+    async def _reconnect(self):
+        while True:
+            await asyncio.sleep(self.reconnect_interval)
+            if self.redis_available:
+                continue
+            try:
+                await self._get_client().ping()
+            except RedisError:
+                continue
+            logger.info("Redis reachable again, switching rate limiting back to Redis")
+            self.redis_available = True
+
+    def start(self):
+        if self._monitor is None:
+            self._monitor = asyncio.create_task(self._reconnect())
+
+    async def stop(self):
+        if self._monitor is not None:
+            self._monitor.cancel()
+            await asyncio.gather(self._monitor, return_exceptions=True)
+            self._monitor = None
+
+    def stats(self) -> dict:
+        return {"backend": "redis" if self.redis_available else "local", "local_keys": len(self.local)}
@@ -0,0 +1,46 @@
+import redis.asyncio as aioredis
+from config.config import config
+from utils.logger import logger
+
+# Shared asyncio Redis client over one bounded connection pool, used by the
+# rate limiter, caches, queues and pub/sub
+_client: aioredis.Redis = None
+
+def get_redis() -> aioredis.Redis:
+    global _client
+    if _client is None:
+        pool = aioredis.BlockingConnectionPool.from_url(
+            config.REDIS_URL,
+            max_connections=config.REDIS_MAX_CONNECTIONS,
+            timeout=config.REDIS_POOL_TIMEOUT,
+            decode_responses=True,
+            socket_timeout=config.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=config.REDIS_SOCKET_TIMEOUT,
+            health_check_interval=config.REDIS_HEALTH_CHECK_INTERVAL,
+        )
+        _client = aioredis.Redis(connection_pool=pool)
+    return _client
+
+def pipeline(transaction: bool = False):
+    # Batch several commands into one round trip: async with pipeline() as pipe: ...
+    return get_redis().pipeline(transaction=transaction)
+
+async def redis_healthy() -> bool:
+    try:
+        return bool(await get_redis().ping())
+    except Exception as e:
+        logger.warning(f"Redis health check failed: {e}")
+        return False
+
+async def init_redis() -> bool:
+    healthy = await redis_healthy()
+    if healthy:
+        logger.info("Connected to Redis successfully")
+    return healthy
+
+async def close_redis():
+    global _client
+    if _client is not None:
+        await _client.close()
+        await _client.connection_pool.disconnect()
+        _client = None
@@ -1,15 +1,20 @@
+import hashlib
+import json
 import uuid
+import zlib
 from datetime import datetime
 
 def generate_report(assessment: dict) -> dict:
-    report_id = f"{assessment['type']}_report_{uuid.uuid4().hex[:6]}"
+    # A stored assessment keeps its report_id and timestamp; new ones get fresh values
+    report_id = assessment.get("report_id") or f"{assessment['type']}_report_{uuid.uuid4().hex}"
+    created_at = assessment.get("created_at") or datetime.utcnow()
     return {
         "report_id": report_id,
         "target": assessment["target"],
         "type": assessment["type"],
         "score": assessment["score"],
         "status": assessment["status"],
-        "created_at": datetime.utcnow().isoformat(),
+        "created_at": created_at.isoformat(),
         "summary": {
             "risk_level": "High" if assessment["score"] < 50 else "Moderate" if assessment["score"] < 75 else "Low",
             "primary_threats": assessment.get("threats", []),
@@ -17,4 +22,12 @@ def generate_report(assessment: dict) -> dict:
         },
         "technical_details": assessment.get("details", {}),
         "recommendations": ["Block target"] if assessment["score"] < 50 else ["Monitor activity"]
-    }
\ No newline at end of file
+    }
+
+def pack_report(report: dict) -> tuple:
+    # Returns (zlib-compressed JSON, quoted ETag) for storage in assessments.report_snapshot
+    body = json.dumps(report, separators=(",", ":")).encode()
+    return zlib.compress(body), f'"{hashlib.sha1(body).hexdigest()}"'
+
+def report_json(snapshot: bytes) -> bytes:
+    return zlib.decompress(snapshot)
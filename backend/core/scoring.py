@@ -1,5 +1,17 @@
-def calculate_email_score(data: dict) -> int:
-    score = 100
+from core.community_index import community_index, SEVERITY_NAMES
+
+# Score deduction by the highest community-reported severity rank (low..critical)
+COMMUNITY_PENALTIES = {1: 5, 2: 10, 3: 20, 4: 30}
+
+def community_penalty(data: dict, type: str, target: str) -> int:
+    # Records the matched severity in data so it shows up in the assessment details
+    rank = community_index.lookup(type, target) if target else 0
+    if rank:
+        data["community_severity"] = SEVERITY_NAMES[rank]
+    return COMMUNITY_PENALTIES.get(rank, 0)
+
+def calculate_email_score(data: dict, target: str = None) -> int:
+    score = 100 - community_penalty(data, "email", target)
     if not data.get("spf_record"):
         score -= 20
     if not data.get("dmarc_record"):
@@ -18,8 +30,8 @@ def calculate_email_score(data: dict) -> int:
         score -= 20
     return max(0, min(100, score))
 
-def calculate_url_score(data: dict) -> int:
-    score = 100
+def calculate_url_score(data: dict, target: str = None) -> int:
+    score = 100 - community_penalty(data, "url", target)
     if not data.get("ssl_valid"):
         score -= 30
     if data.get("malware_detected"):
@@ -32,8 +44,8 @@ def calculate_url_score(data: dict) -> int:
         score -= 20
     return max(0, min(100, score))
 
-def calculate_ip_score(data: dict) -> int:
-    score = 100
+def calculate_ip_score(data: dict, target: str = None) -> int:
+    score = 100 - community_penalty(data, "ip", target)
     if data.get("abuse_score", 0) > 50:
         score -= data["abuse_score"] // 2
     if data.get("threats"):
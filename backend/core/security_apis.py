@@ -1,32 +1,138 @@
-import aiohttp
+import asyncio
+import copy
+import functools
 from config.config import config
+from core.cache import TwoTierCache
+from core.http_client import get_http_session
+from core.redis_client import get_redis
 from urllib.parse import urlparse
 from utils.logger import logger
 
-async def check_shodan_host(target: str) -> dict:
+class SingleFlight:
+    """Coalesces concurrent calls for the same key onto one in-flight task.
+
+    Callers await the shared task through a shield, so one caller being
+    cancelled does not cancel the lookup for the others; the task itself is
+    only cancelled when its last waiter goes away.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.coalesced = 0
+
+    def _forget(self, key, task):
+        call = self._calls.get(key)
+        if call is not None and call[0] is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # mark as retrieved when every waiter has left
+
+    async def do(self, key, fn):
+        call = self._calls.get(key)
+        if call is None:
+            task = asyncio.ensure_future(fn())
+            call = self._calls[key] = [task, 0]
+            task.add_done_callback(functools.partial(self._forget, key))
+        else:
+            self.coalesced += 1
+        call[1] += 1
+        try:
+            return copy.copy(await asyncio.shield(call[0]))
+        except asyncio.CancelledError:
+            if call[1] == 1 and not call[0].done():
+                # Forget it now: a caller arriving before the done-callback runs must start afresh
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                call[0].cancel()
+            raise
+        finally:
+            call[1] -= 1
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._calls), "coalesced": self.coalesced}
+
+single_flight = SingleFlight()
+
+def coalesce(provider: str, key=lambda target: target):
+    # Concurrent calls for the same (provider, key) share one lookup
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(target: str) -> dict:
+            return await single_flight.do((provider, key(target)), lambda: fn(target))
+        return wrapper
+    return decorator
+
+async def with_deadline(awaitable, provider: str, fallback):
+    # Bound a provider lookup by its configured deadline, degrading to fallback
+    timeout = config.PROVIDER_TIMEOUTS.get(provider)
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"{provider} lookup exceeded {timeout}s deadline")
+    except Exception as e:
+        logger.error(f"{provider} lookup failed: {e}")
+    return fallback
+
+shodan_cache = TwoTierCache(
+    "shodan",
+    maxsize=config.SHODAN_CACHE_SIZE,
+    local_ttl=config.SHODAN_CACHE_LOCAL_TTL,
+    redis_ttl=config.SHODAN_CACHE_REDIS_TTL,
+    negative_ttl=config.SHODAN_CACHE_NEGATIVE_TTL,
+    redis=get_redis,
+    retry_interval=config.CACHE_REDIS_RETRY_INTERVAL,
+)
+
+def empty_shodan_result() -> dict:
+    return {"open_ports": [], "vulnerabilities": [], "os": "Unknown", "threats": [], "is_exposed": False}
+
+def normalize_host(target: str) -> str:
     # Extract domain or IP from the target
     parsed = urlparse(target) if target.startswith(("http://", "https://")) else urlparse(f"http://{target}")
     host = parsed.hostname or target
+    return host.strip().rstrip(".").lower()
+
+def normalize_target(type: str, target: str) -> str:
+    # Canonical form used to match the same target across requests and reports
+    target = target.strip()
+    if type == "email":
+        return target.lower()
+    if type == "url":
+        return target
+    return normalize_host(target)
+
+async def _fetch_shodan_host(host: str):
+    # Returns (result, ok); ok is False for non-200 responses and errors
     url = f"https://api.shodan.io/shodan/host/{host}?key={config.SHODAN_API_KEY}"
-    
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return {
-                        "open_ports": data.get("ports", []),
-                        "vulnerabilities": data.get("vulns", []),
-                        "os": data.get("os", "Unknown"),
-                        "threats": [f"Vulnerability: {vuln}" for vuln in data.get("vulns", [])],
-                        "is_exposed": len(data.get("ports", [])) > 0
-                    }
-                else:
-                    return {"open_ports": [], "vulnerabilities": [], "os": "Unknown", "threats": [], "is_exposed": False}
-        except Exception as e:
-            logger.error(f"Shodan error: {e}")
-            return {"open_ports": [], "vulnerabilities": [], "os": "Unknown", "threats": [], "is_exposed": False}
+    session = get_http_session()
+    try:
+        async with session.get(url) as response:
+            if response.status == 200:
+                data = await response.json()
+                return {
+                    "open_ports": data.get("ports", []),
+                    "vulnerabilities": data.get("vulns", []),
+                    "os": data.get("os", "Unknown"),
+                    "threats": [f"Vulnerability: {vuln}" for vuln in data.get("vulns", [])],
+                    "is_exposed": len(data.get("ports", [])) > 0
+                }, True
+            else:
+                return empty_shodan_result(), False
+    except Exception as e:
+        logger.error(f"Shodan error: {e}")
+        return empty_shodan_result(), False
+
+@coalesce("shodan", key=normalize_host)
+async def check_shodan_host(target: str) -> dict:
+    host = normalize_host(target)
+    cached = await shodan_cache.get(host)
+    if cached is not None:
+        return dict(cached)
+    result, ok = await _fetch_shodan_host(host)
+    await shodan_cache.set(host, result, negative=not ok)
+    return dict(result)
 
+@coalesce("emailrep", key=lambda email: email.strip().lower())
 async def check_email_reputation(email: str) -> dict:
     if not config.EMAILREP_API_KEY:
         logger.warning("EmailRep API key is missing; using mocked response")
@@ -51,6 +157,7 @@ async def check_email_reputation(email: str) -> dict:
         "phishing_indicators": ["Recent domain", "Suspicious pattern"]
     }
 
+@coalesce("url")
 async def check_url_security(url: str) -> dict:
     # Use Shodan for network-related checks
     shodan_data = await check_shodan_host(url)
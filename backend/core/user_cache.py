@@ -0,0 +1,88 @@
+import asyncio
+import uuid
+from dataclasses import dataclass
+from config.config import config
+from core.cache import TTLCache
+from core.redis_client import get_redis
+from utils.logger import logger
+
+INVALIDATION_CHANNEL = "user_cache:invalidate"
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    # Projection of User carrying only what request handlers read
+    id: uuid.UUID
+    email: str
+    plan: str
+
+class UserCache:
+    """Short-TTL cache of authenticated users keyed by token subject.
+
+    Invalidations are applied locally and published over Redis so other
+    API workers drop their copy too.
+    """
+
+    def __init__(self):
+        self._cache = TTLCache(config.USER_CACHE_SIZE, config.USER_CACHE_TTL)
+        self._listener = None
+        self._stopping = False
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, subject: str) -> AuthenticatedUser:
+        user = self._cache.get(subject)
+        if user is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return user
+
+    def set(self, subject: str, user: AuthenticatedUser):
+        self._cache.set(subject, user)
+
+    async def invalidate(self, subject: str):
+        self._cache.delete(subject)
+        try:
+            await get_redis().publish(INVALIDATION_CHANNEL, subject)
+        except Exception as e:
+            logger.warning(f"Failed to publish user cache invalidation: {e}")
+
+    async def _listen(self):
+        while not self._stopping:
+            pubsub = get_redis().pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Poll rather than block so stop() never cancels a pending read
+                while not self._stopping:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None:
+                        self._cache.delete(message["data"])
+            except Exception as e:
+                # Entries may be stale while disconnected, so start from a clean slate
+                logger.warning(f"User cache invalidation listener disconnected: {e}")
+                self._cache.clear()
+                await asyncio.sleep(config.USER_CACHE_RESUBSCRIBE_DELAY)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+    def start(self):
+        if self._listener is None:
+            self._stopping = False
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._stopping = True
+            try:
+                await asyncio.wait_for(self._listener, timeout=config.USER_CACHE_RESUBSCRIBE_DELAY + 2)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+            self._listener = None
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache)}
+
+user_cache = UserCache()
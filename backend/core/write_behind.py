@@ -0,0 +1,205 @@
+import asyncio
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.config import config
+from core.quotas import record_scans
+from db.database import AsyncSessionLocal, Assessment
+from utils.logger import logger
+
+MODES = ("sync", "group", "async")
+# Errors that belong to one row and won't go away on retry
+ROW_ERRORS = (IntegrityError, DataError)
+
+class AssessmentWriter:
+    """Persists Assessment rows, optionally batching them across requests.
+
+    Modes (ASSESSMENT_WRITE_MODE):
+      sync  - insert and commit in the caller's session (one transaction per scan)
+      group - buffer and flush with one multi-row insert; the caller waits for
+              the commit, so a successful response is still durable
+      async - write-behind; the caller returns once the row is buffered. Rows
+              not yet flushed are lost if the process dies, bounded by the
+              flush interval and batch size.
+
+    Buffered rows are served from a per-process lookaside until they land.
+    A row rejected by the database (say a duplicate report_id) is dropped on
+    its own; the rest of its batch is still written.
+    """
+
+    def __init__(self, mode: str = "sync", batch_size: int = 100, flush_interval: float = 0.2, max_pending: int = 5000):
+        if mode not in MODES:
+            raise ValueError(f"Unknown assessment write mode: {mode}")
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.started = False
+        self._stopping = False
+        self._buffer = []  # (record, future or None)
+        self._pending = {}  # report_id -> record
+        self._lock = None
+        self._wake = None
+        self._flusher = None
+        self.flushes = 0
+        self.flushed = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+        self.rejected = 0
+
+    def start(self):
+        if self.started or self.mode == "sync":
+            return
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._flusher = asyncio.create_task(self._run())
+        self.started = True
+
+    async def stop(self):
+        if not self.started:
+            return
+        # Let an in-flight flush finish rather than cancelling it with its batch swapped out
+        self._stopping = True
+        self._wake.set()
+        await asyncio.gather(self._flusher, return_exceptions=True)
+        await self.flush()
+        if self._buffer:
+            logger.error(f"Dropping {len(self._buffer)} unflushed assessments on shutdown")
+        self.started = False
+
+    async def write(self, db: AsyncSession, records: list) -> set:
+        # Returns the report_ids the database rejected (async mode can't know, so never any);
+        # raises when nothing at all was written
+        if not records:
+            return set()
+        if not self.started:
+            return self._check_rejected(records, await self._persist(db, records))
+        if len(self._buffer) >= self.max_pending:
+            await self.flush()
+        futures = []
+        for record in records:
+            # Stamp now so the row sorts by when it was assessed, not when it was flushed
+            record.setdefault("created_at", datetime.utcnow())
+            future = asyncio.get_running_loop().create_future() if self.mode == "group" else None
+            self._buffer.append((record, future))
+            self._pending[record["report_id"]] = record
+            if future is not None:
+                futures.append(future)
+        if len(self._buffer) >= self.batch_size:
+            self._wake.set()
+        if not futures:
+            return set()
+        errors = await asyncio.gather(*futures)
+        return self._check_rejected(records, {record["report_id"]: error for record, error in zip(records, errors) if error is not None})
+
+    @staticmethod
+    def _check_rejected(records: list, rejected: dict) -> set:
+        if rejected and len(rejected) == len(records):
+            raise next(iter(rejected.values()))
+        return set(rejected)
+
+    def lookup(self, report_id: str, user_id):
+        record = self._pending.get(report_id)
+        if record is not None and record["user_id"] == user_id:
+            return record
+        return None
+
+    async def flush(self):
+        async with self._lock:
+            if not self._buffer:
+                return
+            batch, self._buffer = self._buffer, []
+            records = [record for record, _ in batch]
+            try:
+                async with AsyncSessionLocal() as db:
+                    rejected = await self._persist(db, records)
+            except BaseException as e:
+                self.failed_flushes += 1
+                logger.error(f"Assessment flush of {len(records)} rows failed: {e!r}")
+                self._requeue(batch, e)
+                if not isinstance(e, Exception):
+                    raise
+                return
+            self.flushes += 1
+            self.flushed += len(records) - len(rejected)
+            for record, _ in batch:
+                self._pending.pop(record["report_id"], None)
+            # Group writers get their row's rejection, if any, as the future's result
+            for record, future in batch:
+                if future is not None and not future.done():
+                    future.set_result(rejected.get(record["report_id"]))
+
+    def _requeue(self, batch: list, error: BaseException):
+        # Group writers are waiting and get the error; write-behind rows are retried
+        if not isinstance(error, Exception):
+            error = RuntimeError(f"Assessment flush interrupted: {error!r}")
+        for record, future in batch:
+            if future is not None:
+                self._pending.pop(record["report_id"], None)
+                if not future.done():
+                    future.set_exception(error)
+        self._buffer[:0] = [(record, None) for record, future in batch if future is None]
+        overflow = len(self._buffer) - self.max_pending
+        if overflow > 0:
+            for record, _ in self._buffer[:overflow]:
+                self._pending.pop(record["report_id"], None)
+            del self._buffer[:overflow]
+            self.dropped += overflow
+            logger.error(f"Assessment buffer full; dropped {overflow} unflushed rows")
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def _persist(self, db: AsyncSession, records: list) -> dict:
+        # One multi-row insert; if a row violates a constraint, retry row by row under
+        # savepoints and drop the offenders. Returns {report_id: error} for dropped rows.
+        try:
+            await db.execute(insert(Assessment), records)
+            rejected = {}
+        except ROW_ERRORS as e:
+            await db.rollback()
+            logger.warning(f"Multi-row assessment insert rejected, retrying {len(records)} rows individually: {e.orig}")
+            rejected = await self._insert_rows(db, records)
+        for user_id, count in Counter(record["user_id"] for record in records if record["report_id"] not in rejected).items():
+            await record_scans(db, user_id, count)
+        await db.commit()
+        return rejected
+
+    async def _insert_rows(self, db: AsyncSession, records: list) -> dict:
+        rejected = {}
+        for record in records:
+            try:
+                async with db.begin_nested():
+                    await db.execute(insert(Assessment), [record])
+            except ROW_ERRORS as e:
+                rejected[record["report_id"]] = e
+                self.rejected += 1
+                logger.error(f"Dropping assessment {record['report_id']} rejected by the database: {e.orig}")
+        return rejected
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode if self.started else "sync",
+            "buffered": len(self._buffer),
+            "flushes": self.flushes,
+            "flushed": self.flushed,
+            "failed_flushes": self.failed_flushes,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+        }
+
+assessment_writer = AssessmentWriter(
+    config.ASSESSMENT_WRITE_MODE,
+    batch_size=config.WRITE_BEHIND_BATCH_SIZE,
+    flush_interval=config.WRITE_BEHIND_FLUSH_INTERVAL,
+    max_pending=config.WRITE_BEHIND_MAX_PENDING,
+)
@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+from sqlalchemy import func, select, tuple_
+from .database import Assessment
+
+# What generate_report reads when a report has to be rebuilt from the row
+REPORT_COLUMNS = (Assessment.report_id, Assessment.target, Assessment.type, Assessment.score, Assessment.status, Assessment.threats, Assessment.details, Assessment.created_at)
+# What listing endpoints render; never the JSON payload columns
+LIST_COLUMNS = (Assessment.id, Assessment.report_id, Assessment.target, Assessment.type, Assessment.score, Assessment.status, Assessment.created_at)
+
+def _naive_utc(value: datetime) -> datetime:
+    # created_at is stored as naive UTC
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+def history_query(user_id, type: str = None, cursor: tuple = None, columns: tuple = (Assessment,), status: str = None, start: datetime = None, end: datetime = None):
+    # Newest first; (created_at, id) matches ix_assessments_user_created for keyset paging
+    query = select(*columns).where(Assessment.user_id == user_id)
+    if type:
+        query = query.where(Assessment.type == type)
+    if status:
+        query = query.where(Assessment.status == status)
+    if start:
+        query = query.where(Assessment.created_at >= _naive_utc(start))
+    if end:
+        query = query.where(Assessment.created_at < _naive_utc(end))
+    if cursor:
+        query = query.where(tuple_(Assessment.created_at, Assessment.id) < tuple_(*cursor))
+    return query.order_by(Assessment.created_at.desc(), Assessment.id.desc())
+
+def history_count(user_id, type: str = None):
+    query = select(func.count()).select_from(Assessment).where(Assessment.user_id == user_id)
+    if type:
+        query = query.where(Assessment.type == type)
+    return query
@@ -1,13 +1,15 @@
-from sqlalchemy import create_engine, Column, String, Integer, Boolean, DateTime, ForeignKey, JSON, func
+from sqlalchemy import create_engine, Column, String, Integer, Boolean, Date, DateTime, ForeignKey, Index, JSON, LargeBinary, UniqueConstraint, func, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, relationship, deferred
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from config.config import config
 
 Base = declarative_base()
 
-# Database Models
+# Database Models (schema changes go through db/migrations; keep indexes here in sync)
 class User(Base):
     __tablename__ = "users"
     
@@ -37,12 +39,21 @@ class Assessment(Base):
     type = Column(String, nullable=False)
     score = Column(Integer, nullable=False)
     status = Column(String, nullable=False)
-    threats = Column(JSON)
-    details = Column(JSON)
+    # Full provider payloads; only loaded for single-report views (undefer_group("payload"))
+    threats = deferred(Column(JSON), group="payload")
+    details = deferred(Column(JSON), group="payload")
     processing_time_ms = Column(Integer)
     created_at = Column(DateTime, server_default=func.now())
+    # Report document built at assessment time (zlib-compressed JSON) and its ETag
+    report_snapshot = deferred(Column(LargeBinary))
+    report_etag = Column(String)
     
     user = relationship("User", back_populates="assessments")
+    
+    __table_args__ = (
+        Index("ix_assessments_user_created", "user_id", created_at.desc(), id.desc()),
+        Index("ix_assessments_user_type_created", "user_id", "type", created_at.desc(), id.desc()),
+    )
 
 class Subscription(Base):
     __tablename__ = "subscriptions"
@@ -60,6 +71,10 @@ class Subscription(Base):
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     user = relationship("User", back_populates="subscriptions")
+    
+    __table_args__ = (
+        Index("ix_subscriptions_user_active", "user_id", postgresql_where=text("status = 'active'")),
+    )
 
 class RateLimit(Base):
     __tablename__ = "rate_limits"
@@ -74,6 +89,14 @@ class RateLimit(Base):
     
     user = relationship("User", back_populates="rate_limits")
 
+class UsageRollup(Base):
+    __tablename__ = "usage_rollups"
+    
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    scans = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
 class APIKey(Base):
     __tablename__ = "api_keys"
     
@@ -115,7 +138,7 @@ class CommunityThreat(Base):
     __tablename__ = "community_threats"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    target = Column(String, nullable=False)
+    target = Column(String, nullable=False, index=True)
     type = Column(String, nullable=False)
     threat_type = Column(String, nullable=False)
     severity = Column(String, nullable=False)
@@ -124,6 +147,39 @@ class CommunityThreat(Base):
     reported_at = Column(DateTime, server_default=func.now())
     
     reporter = relationship("User", back_populates="reported_threats")  # Renamed to avoid ambiguity
+    
+    __table_args__ = (
+        Index("ix_community_threats_reported", reported_at.desc(), id.desc()),
+        Index("ix_community_threats_type_reported", "type", reported_at.desc(), id.desc()),
+        Index("ix_community_threats_severity_reported", "severity", reported_at.desc(), id.desc()),
+        Index("ix_community_threats_threat_type_reported", "threat_type", reported_at.desc(), id.desc()),
+    )
+
+class CommunityThreatRollup(Base):
+    __tablename__ = "community_threat_rollups"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    target = Column(String, nullable=False)
+    type = Column(String, nullable=False)
+    report_count = Column(Integer, nullable=False, default=0)
+    reporter_count = Column(Integer, nullable=False, default=0)
+    max_severity = Column(String, nullable=False)
+    severity_rank = Column(Integer, nullable=False, default=0)
+    first_seen = Column(DateTime, nullable=False)
+    last_seen = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint("target", "type"),
+        Index("ix_community_threat_rollups_last_seen", last_seen.desc(), id.desc()),
+        Index("ix_community_threat_rollups_type_last_seen", "type", last_seen.desc(), id.desc()),
+    )
+
+class CommunityThreatReporter(Base):
+    __tablename__ = "community_threat_reporters"
+    
+    target = Column(String, primary_key=True)
+    type = Column(String, primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
 
 class Resource(Base):
     __tablename__ = "resources"
@@ -131,17 +187,36 @@ class Resource(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String, nullable=False)
     content = Column(String)
-    category = Column(String, nullable=False)
+    category = Column(String, nullable=False, index=True)
     created_at = Column(DateTime, server_default=func.now())
 
 # Database Setup
-engine = create_engine(config.DATABASE_URL, echo=config.ENVIRONMENT == "development")
-Base.metadata.create_all(engine)
+POOL_OPTIONS = {
+    "pool_size": config.DB_POOL_SIZE,
+    "max_overflow": config.DB_MAX_OVERFLOW,
+    "pool_timeout": config.DB_POOL_TIMEOUT,
+    "pool_recycle": config.DB_POOL_RECYCLE,
+    "pool_pre_ping": True,
+}
+
+engine = create_engine(config.DATABASE_URL, echo=config.ENVIRONMENT == "development", **POOL_OPTIONS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for request handlers; same database through the asyncpg driver
+async_engine = create_async_engine(
+    make_url(config.DATABASE_URL).set(drivername="postgresql+asyncpg"),
+    echo=config.ENVIRONMENT == "development",
+    **POOL_OPTIONS,
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
\ No newline at end of file
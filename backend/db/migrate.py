@@ -0,0 +1,47 @@
+from pathlib import Path
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from utils.logger import logger
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+LOCK_ID = 7_310_224  # pg advisory lock key shared by every process that migrates
+
+def available_migrations() -> list:
+    return sorted(MIGRATIONS_DIR.glob("*.sql"))
+
+def migrate(engine: Engine = None) -> list:
+    """Apply pending migrations in version order; returns the versions applied.
+
+    Each migration runs in its own transaction. An advisory lock keeps
+    concurrently starting API processes from racing each other.
+    """
+    if engine is None:
+        from db.database import engine
+    applied_now = []
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": LOCK_ID})
+        conn.commit()
+        try:
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                "version VARCHAR(255) PRIMARY KEY, applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+            ))
+            applied = set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+            conn.commit()
+            for path in available_migrations():
+                version = path.stem
+                if version in applied:
+                    continue
+                with conn.begin():
+                    conn.exec_driver_sql(path.read_text())
+                    conn.execute(text("INSERT INTO schema_migrations (version) VALUES (:version)"), {"version": version})
+                logger.info(f"Applied migration {version}")
+                applied_now.append(version)
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": LOCK_ID})
+            conn.commit()
+    return applied_now
+
+if __name__ == "__main__":
+    versions = migrate()
+    print(f"Applied: {', '.join(versions)}" if versions else "Schema is up to date")
@@ -0,0 +1,12 @@
+-- Indexes for the filters and orderings the application actually runs
+
+-- /api/history: newest-first keyset paging per user, optionally by type
+CREATE INDEX IF NOT EXISTS ix_assessments_user_created ON assessments (user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_assessments_user_type_created ON assessments (user_id, type, created_at DESC, id DESC);
+
+-- Subscription status lookups only ever ask for the active row
+CREATE INDEX IF NOT EXISTS ix_subscriptions_user_active ON subscriptions (user_id) WHERE status = 'active';
+
+CREATE INDEX IF NOT EXISTS ix_community_threats_target ON community_threats (target);
+
+CREATE INDEX IF NOT EXISTS ix_resources_category ON resources (category);
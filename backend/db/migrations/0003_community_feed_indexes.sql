@@ -0,0 +1,6 @@
+-- Community feed: newest-first keyset paging, optionally filtered by a single column
+
+CREATE INDEX IF NOT EXISTS ix_community_threats_reported ON community_threats (reported_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_community_threats_type_reported ON community_threats (type, reported_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_community_threats_severity_reported ON community_threats (severity, reported_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_community_threats_threat_type_reported ON community_threats (threat_type, reported_at DESC, id DESC);
@@ -0,0 +1,57 @@
+-- Per-(target, type) aggregates of community reports, maintained by report_threat
+
+CREATE TABLE IF NOT EXISTS community_threat_rollups (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    target VARCHAR(500) NOT NULL,
+    type VARCHAR(50) NOT NULL,
+    report_count INTEGER NOT NULL DEFAULT 0,
+    reporter_count INTEGER NOT NULL DEFAULT 0,
+    max_severity VARCHAR(50) NOT NULL,
+    severity_rank INTEGER NOT NULL DEFAULT 0,
+    first_seen TIMESTAMP NOT NULL,
+    last_seen TIMESTAMP NOT NULL,
+    UNIQUE (target, type)
+);
+
+CREATE INDEX IF NOT EXISTS ix_community_threat_rollups_last_seen ON community_threat_rollups (last_seen DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_community_threat_rollups_type_last_seen ON community_threat_rollups (type, last_seen DESC, id DESC);
+
+-- One row per distinct reporter of a target, so reporter_count stays exact without COUNT(DISTINCT)
+CREATE TABLE IF NOT EXISTS community_threat_reporters (
+    target VARCHAR(500) NOT NULL,
+    type VARCHAR(50) NOT NULL,
+    user_id UUID REFERENCES users(id) ON DELETE CASCADE,
+    PRIMARY KEY (target, type, user_id)
+);
+
+-- Backfill from existing reports. Target normalisation mirrors core.assessment.dedupe_key
+-- for plain emails, URLs and hosts.
+CREATE TEMPORARY TABLE normalized_threats ON COMMIT DROP AS
+SELECT
+    CASE WHEN type = 'email' THEN lower(trim(target))
+         WHEN type = 'url' THEN trim(target)
+         ELSE rtrim(lower(trim(target)), '.') END AS target,
+    type,
+    severity,
+    CASE lower(severity) WHEN 'low' THEN 1 WHEN 'medium' THEN 2 WHEN 'high' THEN 3 WHEN 'critical' THEN 4 ELSE 0 END AS severity_rank,
+    reported_by,
+    reported_at
+FROM community_threats;
+
+INSERT INTO community_threat_reporters (target, type, user_id)
+SELECT DISTINCT target, type, reported_by FROM normalized_threats WHERE reported_by IS NOT NULL
+ON CONFLICT DO NOTHING;
+
+INSERT INTO community_threat_rollups (target, type, report_count, reporter_count, max_severity, severity_rank, first_seen, last_seen)
+SELECT
+    target,
+    type,
+    count(*),
+    count(DISTINCT reported_by),
+    (array_agg(severity ORDER BY severity_rank DESC, reported_at DESC))[1],
+    max(severity_rank),
+    min(reported_at),
+    max(reported_at)
+FROM normalized_threats
+GROUP BY target, type
+ON CONFLICT (target, type) DO NOTHING;
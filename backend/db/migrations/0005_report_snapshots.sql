@@ -0,0 +1,3 @@
+-- Report documents are stored at assessment time; older rows are filled in on first fetch
+ALTER TABLE assessments ADD COLUMN IF NOT EXISTS report_snapshot BYTEA;
+ALTER TABLE assessments ADD COLUMN IF NOT EXISTS report_etag VARCHAR(64);
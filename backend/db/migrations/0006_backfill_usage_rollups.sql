@@ -0,0 +1,9 @@
+-- usage_rollups only counted scans from the deploy that introduced it onwards; rebuild the
+-- current month from assessments so quota counters primed from it start at the real usage.
+-- GREATEST keeps any day that has already counted more than its stored assessments.
+INSERT INTO usage_rollups (user_id, day, scans)
+SELECT user_id, created_at::date, count(*)
+FROM assessments
+WHERE user_id IS NOT NULL AND created_at >= date_trunc('month', now() AT TIME ZONE 'UTC')
+GROUP BY 1, 2
+ON CONFLICT (user_id, day) DO UPDATE SET scans = GREATEST(usage_rollups.scans, EXCLUDED.scans), updated_at = CURRENT_TIMESTAMP;
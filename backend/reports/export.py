@@ -0,0 +1,92 @@
+import asyncio
+import csv
+import io
+import json
+import zipfile
+from config.config import config
+from db.assessments import history_query, REPORT_COLUMNS
+from db.database import AsyncSessionLocal, Assessment
+from reports.pdf_cache import pdf_cache
+
+EXPORT_COLUMNS = REPORT_COLUMNS + (Assessment.report_etag,)
+CSV_FIELDS = ("report_id", "target", "type", "score", "status", "threats", "details", "created_at")
+
+async def _partitions(user_id, filters: dict):
+    # Rows arrive from a server-side cursor EXPORT_BATCH_SIZE at a time, so memory stays flat
+    async with AsyncSessionLocal() as db:
+        query = history_query(user_id, columns=EXPORT_COLUMNS, **filters).execution_options(yield_per=config.EXPORT_BATCH_SIZE)
+        result = await db.stream(query)
+        async for partition in result.mappings().partitions():
+            yield partition
+
+def _row(row) -> dict:
+    return {
+        "report_id": row["report_id"],
+        "target": row["target"],
+        "type": row["type"],
+        "score": row["score"],
+        "status": row["status"],
+        "threats": row["threats"] or [],
+        "details": row["details"] or {},
+        "created_at": row["created_at"].isoformat(),
+    }
+
+async def export_ndjson(user_id, filters: dict):
+    async for partition in _partitions(user_id, filters):
+        yield "".join(json.dumps(_row(row)) + "\n" for row in partition).encode()
+
+async def export_csv(user_id, filters: dict):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    async for partition in _partitions(user_id, filters):
+        for row in partition:
+            row = _row(row)
+            writer.writerow({**row, "threats": "; ".join(row["threats"]), "details": json.dumps(row["details"])})
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+class _ZipSink:
+    """Write-only, unseekable target for ZipFile; chunks are drained as they are written."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+async def _pdf(row) -> bytes:
+    source = {"target": row["target"], "type": row["type"], "score": row["score"], "status": row["status"], "threats": row["threats"] or []}
+    content_hash = row["report_etag"].strip('"') if row["report_etag"] else None
+    return await pdf_cache.read_or_render(row["report_id"], content_hash, source)
+
+async def export_zip(user_id, filters: dict):
+    sink = _ZipSink()
+    # PDFs are already compressed; storing them keeps the export CPU-cheap
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+        async for partition in _partitions(user_id, filters):
+            pdfs = await asyncio.gather(*[_pdf(row) for row in partition])
+            for row, pdf in zip(partition, pdfs):
+                info = zipfile.ZipInfo(f"{row['report_id']}.pdf", date_time=row["created_at"].timetuple()[:6])
+                archive.writestr(info, pdf)
+            yield sink.drain()
+    yield sink.drain()
+
+# format -> (generator, media type, file extension)
+EXPORTERS = {
+    "ndjson": (export_ndjson, "application/x-ndjson", "ndjson"),
+    "csv": (export_csv, "text/csv", "csv"),
+    "zip": (export_zip, "application/zip", "zip"),
+}
@@ -0,0 +1,102 @@
+import asyncio
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from config.config import config
+from core.security_apis import SingleFlight
+from reports.pdf_generator import generate_pdf_report, render_pdf_file
+
+class PDFCache:
+    """Rendered report PDFs on local disk, keyed by report id plus content hash.
+
+    reportlab runs in a process pool so rendering never blocks the event
+    loop; concurrent requests for the same PDF share one render. Files are
+    evicted least-recently-used (by mtime, refreshed on hit) once the
+    directory exceeds max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, workers: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self._executor = None
+        self._renders = SingleFlight()
+        self._size = None
+        self.hits = 0
+        self.renders = 0
+        self.evictions = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs an event loop and DB pools is unsafe
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def path(self, report_id: str, content_hash: str) -> Path:
+        return self.directory / f"{re.sub(r'[^A-Za-z0-9_-]', '_', report_id)}-{content_hash}.pdf"
+
+    async def get(self, report_id: str, content_hash: str, source) -> Path:
+        # source is a zero-argument callable returning generate_pdf_report input; only called on a miss
+        path = self.path(report_id, content_hash)
+        try:
+            os.utime(path)
+            self.hits += 1
+            return path
+        except FileNotFoundError:
+            pass
+        return await self._renders.do(path, lambda: self._render(path, source()))
+
+    async def read_or_render(self, report_id: str, content_hash: str, source: dict) -> bytes:
+        # For bulk exports: reuse a cached file if there is one, but don't fill the cache
+        if content_hash:
+            try:
+                return await asyncio.to_thread(self.path(report_id, content_hash).read_bytes)
+            except FileNotFoundError:
+                pass
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), generate_pdf_report, source)
+
+    async def _render(self, path: Path, source: dict) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        size = await asyncio.get_running_loop().run_in_executor(self._get_executor(), render_pdf_file, source, str(path))
+        self.renders += 1
+        if self._size is not None:
+            self._size += size
+        if self._size is None or self._size > self.max_bytes:
+            await asyncio.to_thread(self._evict, path)
+        return path
+
+    def _evict(self, keep: Path):
+        # Rescan so files written by other processes are accounted for
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pdf"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, file in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if file == str(keep):
+                continue
+            try:
+                os.unlink(file)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "renders": self.renders, "evictions": self.evictions, "size_bytes": self._size, "max_bytes": self.max_bytes}
+
+pdf_cache = PDFCache(config.PDF_CACHE_DIR, config.PDF_CACHE_MAX_BYTES, config.PDF_RENDER_WORKERS)
@@ -1,10 +1,13 @@
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 import io
+import os
+import tempfile
 
 def generate_pdf_report(assessment: dict) -> bytes:
     buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
+    # invariant: byte-identical output for the same input, so ETags and byte ranges stay valid across renders
+    c = canvas.Canvas(buffer, pagesize=letter, invariant=1)
     c.drawString(100, 750, f"CyberShield Lite Report: {assessment['target']}")
     c.drawString(100, 730, f"Type: {assessment['type']}")
     c.drawString(100, 710, f"Score: {assessment['score']}")
@@ -16,4 +19,17 @@ def generate_pdf_report(assessment: dict) -> bytes:
     c.showPage()
     c.save()
     buffer.seek(0)
-    return buffer.getvalue()
\ No newline at end of file
+    return buffer.getvalue()
+
+def render_pdf_file(assessment: dict, path: str) -> int:
+    # Process-pool entry point; write-then-rename so readers never see a partial file
+    pdf = generate_pdf_report(assessment)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return len(pdf)
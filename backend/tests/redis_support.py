@@ -0,0 +1,63 @@
+import unittest
+from unittest.mock import patch
+import redis.asyncio as aioredis
+from redis.exceptions import ConnectionError
+from config.config import config
+from core import redis_client
+
+SCRATCH_DB = 15
+
+class RedisTestCase(unittest.IsolatedAsyncioTestCase):
+    """Runs against a scratch Redis database, flushed around each test; skipped when Redis is unreachable.
+
+    The scratch client is also installed as the shared get_redis() client.
+    """
+
+    async def asyncSetUp(self):
+        self.redis = aioredis.from_url(config.REDIS_URL, db=SCRATCH_DB, decode_responses=True, socket_connect_timeout=1)
+        try:
+            await self.redis.ping()
+        except Exception:
+            await self.redis.close()
+            self.skipTest("Redis is not reachable")
+        await self.redis.flushdb()
+        self.addAsyncCleanup(self._close_redis)
+        patcher = patch.object(redis_client, "_client", self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def _close_redis(self):
+        await self.redis.flushdb()
+        await self.redis.close()
+
+class DownRedis:
+    """Client stand-in whose every command fails as if Redis were unreachable; counts attempts."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __getattr__(self, name):
+        async def command(*args, **kwargs):
+            self.calls += 1
+            raise ConnectionError("redis down")
+        return command
+
+    def pipeline(self, transaction: bool = True):
+        return _DownPipeline(self)
+
+class _DownPipeline:
+    def __init__(self, client: DownRedis):
+        self._client = client
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    async def execute(self):
+        self._client.calls += 1
+        raise ConnectionError("redis down")
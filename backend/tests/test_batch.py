@@ -0,0 +1,105 @@
+import asyncio
+import unittest
+import uuid
+from unittest.mock import AsyncMock, patch
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+import api
+from config.config import config
+from core import assessment, quotas
+from core.user_cache import AuthenticatedUser
+
+def _validate(target):
+    if "invalid" in target:
+        raise HTTPException(status_code=400, detail="Invalid target")
+
+class _Pipeline:
+    """Stub pipeline recording calls and the peak number running at once."""
+
+    def __init__(self, fail=()):
+        self.fail = fail
+        self.calls = []
+        self.running = 0
+        self.peak = 0
+
+    async def __call__(self, target):
+        self.calls.append(target)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        if target in self.fail:
+            raise RuntimeError("provider down")
+        return {"target": target, "type": "ip", "score": 90, "status": "Secure", "threats": [], "details": {}}
+
+class TestRunBatch(unittest.IsolatedAsyncioTestCase):
+    async def test_dedupes_by_normalized_target_and_keeps_inputs(self):
+        pipeline = _Pipeline()
+        with patch.dict(assessment.ASSESSORS, {"email": (_validate, pipeline)}):
+            results = await assessment.run_batch([("email", "A@Example.com"), ("email", " a@example.com"), ("email", "b@example.com")], 5)
+        self.assertEqual(sorted(pipeline.calls), ["a@example.com", "b@example.com"])
+        self.assertEqual(results[0]["target"], "A@Example.com")
+        self.assertEqual(results[0]["inputs"], ["A@Example.com", " a@example.com"])
+        self.assertEqual(results[1]["inputs"], ["b@example.com"])
+
+    async def test_isolates_per_target_errors(self):
+        pipeline = _Pipeline(fail=("2.2.2.2",))
+        with patch.dict(assessment.ASSESSORS, {"ip": (_validate, pipeline)}):
+            results = await assessment.run_batch([("ip", "1.1.1.1"), ("ip", "2.2.2.2"), ("ip", "invalid"), ("dns", "x")], 5)
+        self.assertEqual([r["success"] for r in results], [True, False, False, False])
+        self.assertEqual([r.get("error") for r in results[1:]], ["provider down", "Invalid target", "Unsupported target type"])
+        self.assertEqual(pipeline.calls, ["1.1.1.1", "2.2.2.2"])
+
+    async def test_bounds_concurrency(self):
+        pipeline = _Pipeline()
+        with patch.dict(assessment.ASSESSORS, {"ip": (_validate, pipeline)}):
+            results = await assessment.run_batch([("ip", f"10.0.0.{i}") for i in range(10)], 3)
+        self.assertTrue(all(r["success"] for r in results))
+        self.assertEqual(pipeline.peak, 3)
+
+class TestBatchEndpoint(unittest.TestCase):
+    def setUp(self):
+        user = AuthenticatedUser(id=uuid.uuid4(), email="user@example.com", plan="free")
+        api.app.dependency_overrides[api.get_current_user] = lambda: user
+        api.app.dependency_overrides[api.get_async_db] = lambda: None
+        self.addCleanup(api.app.dependency_overrides.clear)
+        for target, name, mock in (
+            (api, "check_rate_limit", AsyncMock()),
+            (api, "release_quota", AsyncMock()),
+            (quotas, "enforce_quota", AsyncMock(side_effect=lambda db, user, count=1: count)),
+        ):
+            patcher = patch.object(target, name, mock)
+            setattr(self, name, patcher.start())
+            self.addCleanup(patcher.stop)
+        patcher = patch.object(api.assessment_writer, "write", AsyncMock(return_value=set()))
+        self.write = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = TestClient(api.app)
+
+    def test_rejects_oversized_batch(self):
+        targets = [{"type": "ip", "target": f"10.0.{i // 256}.{i % 256}"} for i in range(config.BATCH_MAX_TARGETS + 1)]
+        response = self.client.post("/api/assess/batch", json={"targets": targets})
+        self.assertEqual(response.status_code, 400)
+        self.enforce_quota.assert_not_awaited()
+
+    def test_returns_submitted_targets_and_charges_unique_ones(self):
+        pipeline = _Pipeline()
+        with patch.dict(assessment.ASSESSORS, {"email": (_validate, pipeline)}):
+            response = self.client.post("/api/assess/batch", json={"targets": [{"type": "email", "target": "Bob@Example.com"}, {"type": "email", "target": "bob@example.com"}]})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        self.assertEqual(data["summary"], {"submitted": 2, "unique": 1, "succeeded": 1, "failed": 0})
+        self.assertEqual(data["results"][0]["target"], "Bob@Example.com")
+        self.assertEqual(data["results"][0]["data"]["target"], "Bob@Example.com")
+        self.assertEqual(self.enforce_quota.await_args.args[2], 1)
+        self.assertEqual(len(self.write.await_args.args[1]), 1)
+
+    def test_releases_quota_for_failed_targets(self):
+        pipeline = _Pipeline(fail=("2.2.2.2",))
+        with patch.dict(assessment.ASSESSORS, {"ip": (_validate, pipeline)}):
+            response = self.client.post("/api/assess/batch", json={"targets": [{"type": "ip", "target": "1.1.1.1"}, {"type": "ip", "target": "2.2.2.2"}]})
+        self.assertEqual(response.json()["data"]["summary"]["failed"], 1)
+        self.assertEqual(self.release_quota.await_args.args[1], 1)
+
+if __name__ == "__main__":
+    unittest.main()
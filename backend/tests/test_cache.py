@@ -0,0 +1,75 @@
+import asyncio
+import time
+import unittest
+from core.cache import TTLCache, TwoTierCache
+from redis_support import DownRedis, RedisTestCase
+
+class TestTTLCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_entries_expire(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("a", 1, ttl=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+class TestTwoTierCache(unittest.IsolatedAsyncioTestCase):
+    async def test_counts_hits_and_misses_without_redis(self):
+        cache = TwoTierCache("test", maxsize=10, local_ttl=60, redis_ttl=600, negative_ttl=30)
+        self.assertIsNone(await cache.get("example.com"))
+        await cache.set("example.com", {"open_ports": [80]})
+        self.assertEqual(await cache.get("example.com"), {"open_ports": [80]})
+        stats = cache.stats()
+        self.assertEqual(stats["local_hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    async def test_negative_results_use_shorter_ttl(self):
+        cache = TwoTierCache("test", maxsize=10, local_ttl=60, redis_ttl=600, negative_ttl=0.01)
+        await cache.set("down.example.com", {"open_ports": []}, negative=True)
+        time.sleep(0.02)
+        self.assertIsNone(await cache.get("down.example.com"))
+
+class TestTwoTierCacheRedisOutage(unittest.IsolatedAsyncioTestCase):
+    async def test_skips_redis_tier_after_failure(self):
+        redis = DownRedis()
+        cache = TwoTierCache("test", maxsize=10, local_ttl=60, redis_ttl=600, negative_ttl=30, redis=lambda: redis, retry_interval=0.05)
+        self.assertIsNone(await cache.get("a.example.com"))
+        await cache.set("a.example.com", {"open_ports": []})
+        self.assertIsNone(await cache.get("b.example.com"))
+        self.assertEqual(redis.calls, 1)
+        self.assertEqual(await cache.get("a.example.com"), {"open_ports": []})
+        self.assertFalse(cache.stats()["redis_available"])
+        time.sleep(0.06)
+        self.assertIsNone(await cache.get("b.example.com"))
+        self.assertEqual(redis.calls, 2)
+
+class TestTwoTierCacheSharedTier(RedisTestCase):
+    def _cache(self):
+        return TwoTierCache("test", maxsize=10, local_ttl=60, redis_ttl=600, negative_ttl=0.2, redis=lambda: self.redis)
+
+    async def test_redis_hit_keeps_remaining_ttl_locally(self):
+        writer, reader = self._cache(), self._cache()
+        await writer.set("down.example.com", {"open_ports": []}, negative=True)
+        self.assertEqual(await reader.get("down.example.com"), {"open_ports": []})
+        self.assertEqual(reader.stats()["redis_hits"], 1)
+        await asyncio.sleep(0.25)
+        self.assertIsNone(await reader.get("down.example.com"))
+
+    async def test_positive_redis_hit_uses_local_ttl(self):
+        writer, reader = self._cache(), self._cache()
+        await writer.set("up.example.com", {"open_ports": [80]})
+        await reader.get("up.example.com")
+        await self.redis.delete("cache:test:up.example.com")
+        self.assertEqual(await reader.get("up.example.com"), {"open_ports": [80]})
+
+if __name__ == "__main__":
+    unittest.main()
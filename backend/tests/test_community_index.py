@@ -0,0 +1,60 @@
+import unittest
+from unittest import mock
+from core.community_index import BloomFilter, CommunityIndex
+from core.scoring import calculate_url_score
+
+class TestBloomFilter(unittest.TestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        keys = [f"host{i}.example.com" for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+
+    def test_false_positive_rate_is_bounded(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"host{i}.example.com")
+        false_positives = sum(f"other{i}.example.org" in bloom for i in range(10000))
+        self.assertLess(false_positives / 10000, 0.03)
+
+class TestCommunityIndex(unittest.TestCase):
+    def test_lookup_normalizes_targets(self):
+        index = CommunityIndex(capacity=10)
+        index.add("email", " Victim@Example.com", 2)
+        index.add("ip", "10.0.0.1.", 1)
+        self.assertEqual(index.lookup("email", "victim@example.com"), 2)
+        self.assertEqual(index.lookup("ip", "10.0.0.1"), 1)
+        self.assertEqual(index.lookup("ip", "10.0.0.2"), 0)
+
+    def test_url_matches_reported_host(self):
+        index = CommunityIndex(capacity=10)
+        index.add("url", "phish.example.com", 4)
+        self.assertEqual(index.lookup("url", "https://phish.example.com/login"), 4)
+
+    def test_keeps_highest_severity(self):
+        index = CommunityIndex(capacity=10)
+        index.add("ip", "10.0.0.1", 3)
+        index.add("ip", "10.0.0.1", 1)
+        self.assertEqual(index.lookup("ip", "10.0.0.1"), 3)
+
+    def test_grows_past_capacity(self):
+        index = CommunityIndex(capacity=4)
+        for i in range(50):
+            index.add("ip", f"10.0.0.{i}", 2)
+        self.assertTrue(all(index.lookup("ip", f"10.0.0.{i}") == 2 for i in range(50)))
+        self.assertGreaterEqual(index._bloom.capacity, 50)
+
+class TestCommunityScoring(unittest.TestCase):
+    def test_reported_targets_lose_points(self):
+        index = CommunityIndex(capacity=10)
+        index.add("url", "bad.example.com", 4)
+        with mock.patch("core.scoring.community_index", index):
+            clean, reported = {"ssl_valid": True}, {"ssl_valid": True}
+            self.assertEqual(calculate_url_score(clean, "https://clean.example.com"), 100)
+            self.assertEqual(calculate_url_score(reported, "https://bad.example.com/x"), 70)
+        self.assertNotIn("community_severity", clean)
+        self.assertEqual(reported["community_severity"], "critical")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import csv
+import io
+import json
+import unittest
+import zipfile
+from datetime import datetime
+from unittest.mock import patch
+from reports import export
+
+ROWS = [
+    {"report_id": "ip_report_1", "target": "1.1.1.1", "type": "ip", "score": 90, "status": "Secure", "threats": [], "details": {"os": "Linux"}, "created_at": datetime(2024, 5, 1, 12, 0), "report_etag": None},
+    {"report_id": "url_report_2", "target": "http://a.example", "type": "url", "score": 40, "status": "High Risk", "threats": ["Phishing", "Malware"], "details": {}, "created_at": datetime(2024, 5, 2, 8, 30), "report_etag": None},
+]
+
+async def _partitions(user_id, filters):
+    for row in ROWS:
+        yield [row]
+
+async def _collect(chunks):
+    return b"".join([chunk async for chunk in chunks])
+
+@patch.object(export, "_partitions", _partitions)
+class TestExport(unittest.IsolatedAsyncioTestCase):
+    async def test_ndjson_is_one_row_per_line(self):
+        lines = (await _collect(export.export_ndjson("u", {}))).decode().splitlines()
+        self.assertEqual([json.loads(line)["report_id"] for line in lines], ["ip_report_1", "url_report_2"])
+        self.assertEqual(json.loads(lines[1])["created_at"], "2024-05-02T08:30:00")
+
+    async def test_csv_flattens_threats_and_details(self):
+        rows = list(csv.DictReader(io.StringIO((await _collect(export.export_csv("u", {}))).decode())))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1]["threats"], "Phishing; Malware")
+        self.assertEqual(json.loads(rows[0]["details"]), {"os": "Linux"})
+
+    async def test_zip_streams_a_valid_archive(self):
+        async def render(report_id, content_hash, source):
+            return f"%PDF-{source['target']}".encode()
+        with patch.object(export.pdf_cache, "read_or_render", render):
+            chunks = [chunk async for chunk in export.export_zip("u", {})]
+        self.assertGreater(len([chunk for chunk in chunks if chunk]), 1)
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(archive.namelist(), ["ip_report_1.pdf", "url_report_2.pdf"])
+        self.assertEqual(archive.read("url_report_2.pdf"), b"%PDF-http://a.example")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+import uuid
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+import api
+from core.user_cache import AuthenticatedUser
+from utils.http import etag_matches, parse_range, file_range_response
+
+BODY = bytes(range(256)) * 400
+
+async def _read(response) -> bytes:
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+class TestRanges(unittest.TestCase):
+    def test_parse_range_forms(self):
+        self.assertEqual(parse_range("bytes=0-99", 1000), (0, 99))
+        self.assertEqual(parse_range("bytes=900-", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-10", 1000), (990, 999))
+        self.assertEqual(parse_range("bytes=990-5000", 1000), (990, 999))
+        self.assertIsNone(parse_range(None, 1000))
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 1000))
+        self.assertIsNone(parse_range("items=0-1", 1000))
+
+    def test_unsatisfiable_range(self):
+        with self.assertRaises(HTTPException) as ctx:
+            parse_range("bytes=1000-", 1000)
+        self.assertEqual(ctx.exception.status_code, 416)
+        self.assertEqual(ctx.exception.headers["Content-Range"], "bytes */1000")
+
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('"x", "a"', '"a"'))
+        self.assertTrue(etag_matches('W/"a"', '"a"'))
+        self.assertTrue(etag_matches("*", '"a"'))
+        self.assertFalse(etag_matches('"b"', '"a"'))
+        self.assertFalse(etag_matches(None, '"a"'))
+
+class TestFileRangeResponse(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        tmp = tempfile.NamedTemporaryFile(delete=False)
+        tmp.write(BODY)
+        tmp.close()
+        self.path = tmp.name
+        self.addCleanup(lambda: os.path.exists(self.path) and os.unlink(self.path))
+
+    async def test_full_file(self):
+        response = await file_range_response(self.path, "application/pdf", {"ETag": '"a"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-length"], str(len(BODY)))
+        self.assertEqual(response.headers["accept-ranges"], "bytes")
+        self.assertEqual(await _read(response), BODY)
+
+    async def test_partial_content(self):
+        response = await file_range_response(self.path, "application/pdf", {"ETag": '"a"'}, "bytes=70000-")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.headers["content-range"], f"bytes 70000-{len(BODY) - 1}/{len(BODY)}")
+        self.assertEqual(response.headers["content-length"], str(len(BODY) - 70000))
+        self.assertEqual(await _read(response), BODY[70000:])
+
+    async def test_stale_if_range_sends_whole_file(self):
+        response = await file_range_response(self.path, "application/pdf", {"ETag": '"a"'}, "bytes=10-19", if_range='"b"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(await _read(response), BODY)
+
+    async def test_unsatisfiable_range(self):
+        with self.assertRaises(HTTPException) as ctx:
+            await file_range_response(self.path, "application/pdf", {}, f"bytes={len(BODY)}-")
+        self.assertEqual(ctx.exception.status_code, 416)
+
+    async def test_file_removed_after_open_still_streams(self):
+        response = await file_range_response(self.path, "application/pdf", {})
+        os.unlink(self.path)
+        self.assertEqual(await _read(response), BODY)
+
+    async def test_missing_file(self):
+        os.unlink(self.path)
+        with self.assertRaises(FileNotFoundError):
+            await file_range_response(self.path, "application/pdf", {})
+
+class TestDownloadReport(unittest.TestCase):
+    def test_rerenders_pdf_evicted_before_it_is_opened(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf = Path(tmp, "report.pdf")
+            pdf.write_bytes(b"%PDF-1.4 test")
+            get = AsyncMock(side_effect=[Path(tmp, "evicted.pdf"), pdf])
+            user = AuthenticatedUser(id=uuid.uuid4(), email="user@example.com", plan="free")
+            api.app.dependency_overrides[api.get_current_user] = lambda: user
+            api.app.dependency_overrides[api.get_async_db] = lambda: None
+            self.addCleanup(api.app.dependency_overrides.clear)
+            with patch.object(api, "load_report_snapshot", AsyncMock(return_value=(b"", '"abc"'))), patch.object(api.pdf_cache, "get", get):
+                response = TestClient(api.app).get("/api/reports/ip_report_1/download", headers={"Range": "bytes=0-3"})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, b"%PDF")
+        self.assertEqual(get.await_count, 2)
+
+if __name__ == "__main__":
+    unittest.main()
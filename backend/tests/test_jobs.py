@@ -0,0 +1,180 @@
+import asyncio
+import unittest
+import uuid
+from redis.exceptions import ConnectionError
+from unittest.mock import patch
+from config.config import config
+from core import jobs, redis_client
+from core.jobs import JobQueue, QUEUE_KEY, WORKERS_KEY
+from redis_support import DownRedis, RedisTestCase
+
+class _GatedExecutor:
+    """Stand-in for execute_job that blocks until released."""
+
+    def __init__(self, error: str = None):
+        self.error = error
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def __call__(self, job):
+        self.started.set()
+        await self.release.wait()
+        if self.error:
+            raise RuntimeError(self.error)
+        return {"target": job["target"], "score": 90}
+
+async def _wait_for_status(queue, job_id, status):
+    for _ in range(200):
+        job = await queue.get(job_id)
+        if job["status"] == status:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job never reached {status}")
+
+async def _events(queue, job_id):
+    return [chunk.split("\n")[0].split(": ")[1] async for chunk in queue.events(job_id)]
+
+@patch.object(config, "JOB_EVENTS_POLL_INTERVAL", 0.01)
+class TestLocalJobQueue(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.queue = JobQueue()
+        with patch.object(jobs, "get_redis", lambda: DownRedis()):
+            await self.queue.connect()
+        self.addAsyncCleanup(self.queue.close)
+        self.assertFalse(self.queue.use_redis)
+
+    async def test_runs_job_and_streams_status_changes(self):
+        executor = _GatedExecutor()
+        with patch.object(jobs, "execute_job", executor):
+            job = await self.queue.enqueue("ip", "1.1.1.1", uuid.uuid4(), "user@example.com")
+            await executor.started.wait()
+            events = asyncio.create_task(_events(self.queue, job["id"]))
+            await asyncio.sleep(0.05)
+            executor.release.set()
+            self.assertEqual(await events, ["running", "completed"])
+        job = await self.queue.get(job["id"])
+        self.assertEqual(job["result"], {"target": "1.1.1.1", "score": 90})
+        self.assertEqual(job["attempts"], 1)
+
+    async def test_failed_job_records_error(self):
+        executor = _GatedExecutor(error="provider down")
+        executor.release.set()
+        with patch.object(jobs, "execute_job", executor):
+            job = await self.queue.enqueue("ip", "1.1.1.1", uuid.uuid4(), "user@example.com")
+            job = await _wait_for_status(self.queue, job["id"], "failed")
+        self.assertEqual(job["error"], "provider down")
+        self.assertEqual(await _events(self.queue, job["id"]), ["failed"])
+
+    async def test_unknown_job_streams_error(self):
+        self.assertEqual(await _events(self.queue, "missing"), ["error"])
+
+@patch.object(jobs, "RETRY_DELAY", 0.01)
+class TestJobQueueRedisOutage(unittest.IsolatedAsyncioTestCase):
+    async def test_redis_error_mid_job_keeps_worker_running(self):
+        redis = DownRedis()
+        queue = JobQueue()
+        queue.use_redis = True
+        job_ids = ["job-1"]
+
+        async def next_job_id():
+            if job_ids:
+                return job_ids.pop()
+            await asyncio.Event().wait()
+
+        with patch.object(redis_client, "_client", redis), patch.object(queue, "_next_job_id", next_job_id):
+            worker = asyncio.create_task(queue.work())
+            await asyncio.sleep(0.05)
+            self.assertFalse(worker.done())
+            worker.cancel()
+            await asyncio.gather(worker, return_exceptions=True)
+        # The job lookup failed, then so did handing the job back
+        self.assertEqual(redis.calls, 2)
+
+class TestRedisJobQueue(RedisTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.queue = JobQueue()
+        await self.queue.connect(start_local_workers=False)
+        self.assertTrue(self.queue.use_redis)
+
+    async def asyncTearDown(self):
+        if self.queue._heartbeat is not None:
+            await self.queue.unregister_worker()
+
+    async def _enqueue(self):
+        return await self.queue.enqueue("ip", "1.1.1.1", uuid.uuid4(), "user@example.com")
+
+    async def test_requeues_jobs_from_dead_workers_on_register(self):
+        job = await self._enqueue()
+        await self.redis.lmove(QUEUE_KEY, jobs._processing_key("dead"), "RIGHT", "LEFT")
+        await self.redis.sadd(WORKERS_KEY, "dead")
+        await self.redis.set(jobs._heartbeat_key("alive"), 1)
+        await self.redis.sadd(WORKERS_KEY, "alive")
+        await self.redis.lpush(jobs._processing_key("alive"), "other")
+        await self.queue.register_worker()
+        self.assertEqual(await self.redis.lrange(QUEUE_KEY, 0, -1), [job["id"]])
+        self.assertEqual(await self.redis.smembers(WORKERS_KEY), {"alive", self.queue.worker_id})
+        self.assertEqual(await self.redis.lrange(jobs._processing_key("alive"), 0, -1), ["other"])
+
+    async def test_finished_job_is_removed_from_processing_list(self):
+        executor = _GatedExecutor()
+        executor.release.set()
+        await self.queue.register_worker()
+        with patch.object(jobs, "execute_job", executor):
+            worker = asyncio.create_task(self.queue.work())
+            job = await self._enqueue()
+            await _wait_for_status(self.queue, job["id"], "completed")
+            await asyncio.sleep(0.05)
+            worker.cancel()
+            await asyncio.gather(worker, return_exceptions=True)
+        self.assertEqual(await self.redis.llen(jobs._processing_key(self.queue.worker_id)), 0)
+        self.assertEqual(await self.redis.llen(QUEUE_KEY), 0)
+
+    async def test_interrupted_job_is_requeued_on_shutdown(self):
+        executor = _GatedExecutor()
+        await self.queue.register_worker()
+        with patch.object(jobs, "execute_job", executor):
+            worker = asyncio.create_task(self.queue.work())
+            job = await self._enqueue()
+            await executor.started.wait()
+            worker.cancel()
+            await asyncio.gather(worker, return_exceptions=True)
+        await self.queue.unregister_worker()
+        self.assertEqual(await self.redis.lrange(QUEUE_KEY, 0, -1), [job["id"]])
+        self.assertNotIn(self.queue.worker_id, await self.redis.smembers(WORKERS_KEY))
+
+    async def test_gives_up_after_max_attempts(self):
+        job = await self._enqueue()
+        stored = await self.queue.get(job["id"])
+        stored["attempts"] = config.JOB_MAX_ATTEMPTS
+        await self.queue._save(stored)
+        worker = asyncio.create_task(self.queue.work())
+        job = await _wait_for_status(self.queue, job["id"], "failed")
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+        self.assertIn("abandoned", job["error"])
+
+    @patch.object(jobs, "RETRY_DELAY", 0.01)
+    async def test_job_is_returned_to_queue_after_redis_error(self):
+        executor = _GatedExecutor()
+        executor.release.set()
+        await self.queue.register_worker()
+        save = self.queue._save
+        failures = [ConnectionError("connection reset")]
+
+        async def flaky_save(job):
+            if failures:
+                raise failures.pop()
+            await save(job)
+
+        with patch.object(jobs, "execute_job", executor), patch.object(self.queue, "_save", flaky_save):
+            worker = asyncio.create_task(self.queue.work())
+            job = await self._enqueue()
+            job = await _wait_for_status(self.queue, job["id"], "completed")
+            worker.cancel()
+            await asyncio.gather(worker, return_exceptions=True)
+        self.assertEqual(failures, [])
+        self.assertEqual(await self.redis.llen(jobs._processing_key(self.queue.worker_id)), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import socketserver
+import threading
+import unittest
+from config.config import config
+from core.notifications import NotificationQueue
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """Minimal local SMTP server recording delivered messages."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SMTPHandler)
+        self.messages = []
+        self.connections = 0
+        self.fail_next = 0
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 stand-in ready")
+        while True:
+            line = self.rfile.readline().decode().strip()
+            if not line:
+                return
+            command = line.split(" ", 1)[0].upper()
+            if command in ("EHLO", "HELO"):
+                self.reply("250 stand-in")
+            elif command == "DATA":
+                self.reply("354 go ahead")
+                data = []
+                while (chunk := self.rfile.readline().decode()) != ".\r\n":
+                    data.append(chunk)
+                if self.server.fail_next:
+                    self.server.fail_next -= 1
+                    self.reply("451 try again later")
+                else:
+                    self.server.messages.append("".join(data))
+                    self.reply("250 queued")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+ASSESSMENT = {"target": "example.com", "type": "url", "score": 40, "status": "High Risk", "threats": ["Phishing"]}
+
+class TestNotificationQueue(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = SMTPStandIn()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.saved = {k: getattr(config, k) for k in ("SMTP_HOST", "SMTP_PORT", "SMTP_USER", "SMTP_PASS", "SMTP_USE_TLS", "NOTIFY_QUEUE_BACKEND", "NOTIFY_WORKERS", "NOTIFY_RETRY_BASE_DELAY")}
+        config.SMTP_HOST, config.SMTP_PORT = self.server.server_address
+        config.SMTP_USER, config.SMTP_PASS, config.SMTP_USE_TLS = "alerts@example.com", None, False
+        config.NOTIFY_QUEUE_BACKEND, config.NOTIFY_WORKERS, config.NOTIFY_RETRY_BASE_DELAY = "memory", 1, 0.01
+
+    def tearDown(self):
+        for key, value in self.saved.items():
+            setattr(config, key, value)
+        self.server.shutdown()
+        self.server.server_close()
+
+    async def test_reuses_one_connection_for_many_messages(self):
+        queue = NotificationQueue()
+        await queue.start()
+        for i in range(5):
+            await queue.enqueue(f"user{i}@example.com", ASSESSMENT)
+        await queue.stop()
+        self.assertEqual(len(self.server.messages), 5)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(queue.stats()["sent"], 5)
+
+    async def test_retries_transient_failures(self):
+        self.server.fail_next = 2
+        queue = NotificationQueue()
+        await queue.start()
+        await queue.enqueue("user@example.com", ASSESSMENT)
+        await queue.stop()
+        self.assertEqual(len(self.server.messages), 1)
+        self.assertEqual(queue.stats()["retried"], 2)
+        self.assertEqual(queue.stats()["failed"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,21 @@
+import unittest
+import uuid
+from datetime import datetime
+from fastapi import HTTPException
+from utils.pagination import encode_cursor, decode_cursor
+
+class TestCursor(unittest.TestCase):
+    def test_round_trip(self):
+        created_at, id = datetime(2024, 5, 1, 12, 30, 0, 123456), uuid.uuid4()
+        cursor = encode_cursor(created_at, id)
+        self.assertNotIn("=", cursor)
+        self.assertEqual(decode_cursor(cursor), (created_at, id))
+
+    def test_rejects_garbage(self):
+        for cursor in ("zzz", encode_cursor(datetime.now(), "not-a-uuid")):
+            with self.assertRaises(HTTPException) as ctx:
+                decode_cursor(cursor)
+            self.assertEqual(ctx.exception.status_code, 400)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch
+from fastapi import HTTPException
+from config.config import config
+from core import passwords
+
+class TestPasswordBackpressure(unittest.IsolatedAsyncioTestCase):
+    def tearDown(self):
+        passwords.shutdown()
+
+    async def test_cancelled_request_counts_until_thread_finishes(self):
+        release = threading.Event()
+        with patch.object(config, "PASSWORD_HASH_MAX_PENDING", 1):
+            request = asyncio.ensure_future(passwords._run(release.wait))
+            await asyncio.sleep(0.01)
+            request.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await request
+            self.assertEqual(passwords.stats()["pending"], 1)
+            with self.assertRaises(HTTPException) as ctx:
+                await passwords._run(release.wait)
+            self.assertEqual(ctx.exception.status_code, 503)
+            release.set()
+            for _ in range(100):
+                if passwords.stats()["pending"] == 0:
+                    break
+                await asyncio.sleep(0.01)
+            self.assertEqual(passwords.stats()["pending"], 0)
+            self.assertTrue(await passwords._run(release.wait))
+
+if __name__ == "__main__":
+    unittest.main()
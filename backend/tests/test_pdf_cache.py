@@ -0,0 +1,48 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from reports.pdf_cache import PDFCache
+
+def _source(target):
+    return lambda: {"target": target, "type": "ip", "score": 90, "status": "Secure", "threats": []}
+
+class TestPDFCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _cache(self, max_bytes=10 * 1024 * 1024):
+        cache = PDFCache(self.tmp.name, max_bytes=max_bytes, workers=1)
+        self.addCleanup(cache.shutdown)
+        return cache
+
+    async def test_renders_once_per_content_hash(self):
+        cache = self._cache()
+        paths = await asyncio.gather(*[cache.get("ip_report_1", "abc", _source("1.1.1.1")) for _ in range(5)])
+        self.assertEqual(len(set(paths)), 1)
+        self.assertEqual(cache.renders, 1)
+        with open(paths[0], "rb") as f:
+            self.assertEqual(f.read(5), b"%PDF-")
+        await cache.get("ip_report_1", "abc", _source("1.1.1.1"))
+        self.assertEqual((cache.renders, cache.hits), (1, 1))
+        await cache.get("ip_report_1", "def", _source("1.1.1.1"))
+        self.assertEqual(cache.renders, 2)
+
+    async def test_evicts_least_recently_used_beyond_size_limit(self):
+        probe = self._cache()
+        size = os.path.getsize(await probe.get("probe", "0", _source("0.0.0.0")))
+        os.unlink(probe.path("probe", "0"))
+        cache = self._cache(max_bytes=int(size * 2.5))
+        first = await cache.get("r1", "a", _source("1.1.1.1"))
+        os.utime(first, (1, 1))
+        second = await cache.get("r2", "b", _source("2.2.2.2"))
+        os.utime(second, (2, 2))
+        third = await cache.get("r3", "c", _source("3.3.3.3"))
+        self.assertFalse(first.exists())
+        self.assertTrue(second.exists() and third.exists())
+        self.assertEqual(cache.evictions, 1)
+        self.assertFalse([name for name in os.listdir(self.tmp.name) if name.endswith(".tmp")])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import uuid
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.exc import OperationalError
+from config.config import config
+from core.community import feed_query
+from db.assessments import history_query
+from db.database import CommunityThreat, Resource, Subscription
+from db.migrate import migrate
+
+SCHEMA = "query_plan_test"
+
+SEED = [
+    "INSERT INTO users (id, email, password_hash, name) "
+    "SELECT ('00000000-0000-0000-0000-' || lpad(g::text, 12, '0'))::uuid, 'user' || g || '@example.com', 'x', 'User' "
+    "FROM generate_series(1, 500) g",
+    "INSERT INTO assessments (user_id, report_id, target, type, score, status, created_at) "
+    "SELECT u.id, 'r' || g, 't' || g, (ARRAY['email', 'url', 'ip'])[1 + g % 3], g % 100, 'safe', now() - g * interval '1 minute' "
+    "FROM generate_series(1, 50000) g JOIN users u ON u.email = 'user' || (1 + g % 500) || '@example.com'",
+    "INSERT INTO subscriptions (user_id, plan_type, status) "
+    "SELECT id, 'premium', CASE WHEN random() < 0.2 THEN 'active' ELSE 'cancelled' END FROM users, generate_series(1, 10)",
+    "INSERT INTO community_threats (target, type, threat_type, severity, reported_at) "
+    "SELECT 'host' || (g % 5000) || '.example.com', (ARRAY['email', 'url', 'ip'])[1 + g % 3], 'phishing', "
+    "(ARRAY['low', 'medium', 'high', 'critical'])[1 + g % 4], now() - g * interval '1 minute' FROM generate_series(1, 20000) g",
+    "INSERT INTO resources (title, content, category) "
+    "SELECT 'Guide ' || g, 'body', 'category' || (g % 200) FROM generate_series(1, 20000) g",
+]
+
+def _explain(conn, stmt) -> str:
+    compiled = stmt.compile(dialect=conn.dialect)
+    return "\n".join(row[0] for row in conn.exec_driver_sql("EXPLAIN " + compiled.string, compiled.params))
+
+class TestHotQueryPlans(unittest.TestCase):
+    """Migrated schema must serve the application's hot queries from indexes."""
+
+    @classmethod
+    def setUpClass(cls):
+        admin = create_engine(config.DATABASE_URL)
+        try:
+            with admin.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+                conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        except OperationalError:
+            raise unittest.SkipTest("PostgreSQL is not reachable")
+        finally:
+            admin.dispose()
+        cls.engine = create_engine(config.DATABASE_URL, connect_args={"options": f"-csearch_path={SCHEMA},public"})
+        migrate(cls.engine)
+        with cls.engine.begin() as conn:
+            for statement in SEED:
+                conn.execute(text(statement))
+        with cls.engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE"))
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        cls.engine.dispose()
+
+    def assertIndexed(self, stmt):
+        with self.engine.connect() as conn:
+            plan = _explain(conn, stmt)
+        self.assertNotIn("Seq Scan", plan, plan)
+
+    def test_history(self):
+        user_id = str(uuid.UUID(int=7))
+        self.assertIndexed(history_query(user_id).limit(11))
+        self.assertIndexed(history_query(user_id, "url").limit(11))
+
+    def test_active_subscription(self):
+        self.assertIndexed(select(Subscription).where(Subscription.user_id == str(uuid.UUID(int=7)), Subscription.status == "active").limit(1))
+
+    def test_community_threats_by_target(self):
+        self.assertIndexed(select(CommunityThreat).where(CommunityThreat.target == "host42.example.com"))
+
+    def test_community_feed(self):
+        self.assertIndexed(feed_query().limit(51))
+        self.assertIndexed(feed_query(severity="critical").limit(51))
+
+    def test_resources_by_category(self):
+        self.assertIndexed(select(Resource).where(Resource.category == "category7"))
+
+    def test_migrations_are_recorded(self):
+        self.assertEqual(migrate(self.engine), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import asyncio
+import unittest
+import uuid
+from unittest.mock import AsyncMock, patch
+from fastapi import HTTPException
+from config.config import config
+from core import quotas
+from core.user_cache import AuthenticatedUser
+from redis_support import DownRedis, RedisTestCase
+
+class TestQuotaCounters(RedisTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.rollups = AsyncMock(return_value={"day": 4, "month": 30})
+        patcher = patch.object(quotas, "_usage_from_rollups", self.rollups)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = AuthenticatedUser(id=uuid.uuid4(), email="user@example.com", plan="free")
+
+    async def _usage(self):
+        return await quotas.get_usage(None, self.user.id)
+
+    async def test_primes_counters_from_rollups(self):
+        self.assertEqual(await quotas.enforce_quota(None, self.user), 1)
+        self.rollups.assert_awaited_once()
+        self.assertEqual(await self._usage(), {"scans_today": 5, "scans_this_month": 31})
+        keys = await self.redis.keys("quota:*")
+        self.assertEqual(len(keys), 2)
+        self.assertTrue(all([await self.redis.ttl(key) > 0 for key in keys]))
+
+    async def test_concurrent_reservations_never_exceed_limit(self):
+        results = await asyncio.gather(*[quotas.enforce_quota(None, self.user) for _ in range(20)], return_exceptions=True)
+        allowed = [r for r in results if not isinstance(r, HTTPException)]
+        self.assertEqual(len(allowed), config.FREE_LIMITS["scans_per_day"] - 4)
+        self.assertEqual((await self._usage())["scans_today"], config.FREE_LIMITS["scans_per_day"])
+        denied = [r for r in results if isinstance(r, HTTPException)]
+        self.assertTrue(all(r.status_code == 429 and r.detail == "Daily scan quota exceeded" for r in denied))
+
+    async def test_batch_reservation_is_all_or_nothing(self):
+        with self.assertRaises(HTTPException):
+            await quotas.enforce_quota(None, self.user, count=7)
+        self.assertEqual(await self._usage(), {"scans_today": 4, "scans_this_month": 30})
+
+    async def test_release_gives_reservation_back(self):
+        reserved = await quotas.enforce_quota(None, self.user, count=3)
+        await quotas.release_quota(self.user.id, reserved)
+        self.assertEqual(await self._usage(), {"scans_today": 4, "scans_this_month": 30})
+
+    async def test_release_does_not_create_counters(self):
+        await quotas.release_quota(self.user.id, 2)
+        self.assertEqual(await self.redis.keys("quota:*"), [])
+
+    async def test_reservation_released_when_block_raises(self):
+        with self.assertRaises(RuntimeError):
+            async with quotas.reserve_quota(None, self.user):
+                raise RuntimeError("provider down")
+        self.assertEqual(await self._usage(), {"scans_today": 4, "scans_this_month": 30})
+
+    async def test_unlimited_plan_is_still_counted(self):
+        premium = AuthenticatedUser(id=self.user.id, email=self.user.email, plan="premium")
+        for _ in range(10):
+            await quotas.enforce_quota(None, premium)
+        self.assertEqual((await self._usage())["scans_today"], 14)
+
+class TestQuotaFallback(unittest.IsolatedAsyncioTestCase):
+    async def test_checks_rollups_when_redis_is_down(self):
+        redis = DownRedis()
+        user = AuthenticatedUser(id=uuid.uuid4(), email="user@example.com", plan="free")
+        limit = config.FREE_LIMITS["scans_per_day"]
+        with patch.object(quotas, "get_redis", lambda: redis), patch.object(quotas, "_usage_from_rollups", AsyncMock(return_value={"day": limit - 1, "month": limit - 1})):
+            self.assertEqual(await quotas.enforce_quota(None, user), 0)
+            with self.assertRaises(HTTPException):
+                await quotas.enforce_quota(None, user, count=2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import asyncio
+import unittest
+from unittest import mock
+from redis.exceptions import ConnectionError
+from core.rate_limiter import LocalTokenBucketLimiter, FailoverRateLimiter, RedisRateLimiter
+from redis_support import RedisTestCase
+
+class TestLocalTokenBucketLimiter(unittest.TestCase):
+    def test_allows_burst_then_denies(self):
+        limiter = LocalTokenBucketLimiter(max_keys=10, idle_ttl=60)
+        results = [limiter.hit("user:assess_ip", limit=5, window=60) for _ in range(6)]
+        self.assertEqual([r.allowed for r in results], [True] * 5 + [False])
+        self.assertEqual(results[4].remaining, 0)
+        self.assertGreater(results[5].reset, 0)
+
+    def test_refills_over_time(self):
+        limiter = LocalTokenBucketLimiter(max_keys=10, idle_ttl=60)
+        with mock.patch("core.rate_limiter.time.monotonic", return_value=100.0):
+            for _ in range(5):
+                limiter.hit("k", limit=5, window=60)
+            self.assertFalse(limiter.hit("k", limit=5, window=60).allowed)
+        with mock.patch("core.rate_limiter.time.monotonic", return_value=112.0):
+            self.assertTrue(limiter.hit("k", limit=5, window=60).allowed)
+
+    def test_memory_is_bounded(self):
+        limiter = LocalTokenBucketLimiter(max_keys=3, idle_ttl=60)
+        for i in range(10):
+            limiter.hit(f"user{i}", limit=5, window=60)
+        self.assertEqual(len(limiter), 3)
+
+    def test_idle_keys_are_evicted(self):
+        limiter = LocalTokenBucketLimiter(max_keys=100, idle_ttl=30)
+        with mock.patch("core.rate_limiter.time.monotonic", return_value=0.0):
+            limiter.hit("idle", limit=5, window=60)
+        with mock.patch("core.rate_limiter.time.monotonic", return_value=31.0):
+            limiter.hit("active", limit=5, window=60)
+        self.assertEqual(len(limiter), 1)
+
+class TestFailoverRateLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_falls_back_to_local_buckets_when_redis_fails(self):
+        client = mock.Mock()
+        client.evalsha = mock.AsyncMock(side_effect=ConnectionError("down"))
+        limiter = FailoverRateLimiter(lambda: client, "fixed_window", max_local_keys=10, local_idle_ttl=60, reconnect_interval=5)
+        self.assertTrue((await limiter.hit("k", limit=1, window=60)).allowed)
+        self.assertFalse((await limiter.hit("k", limit=1, window=60)).allowed)
+        self.assertEqual(limiter.stats()["backend"], "local")
+
+class RedisScriptTests:
+    """Shared checks for the Lua scripts; mixed into a RedisTestCase per algorithm."""
+
+    algorithm = None
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.limiter = RedisRateLimiter(lambda: self.redis, self.algorithm)
+
+    async def test_allows_up_to_limit_then_denies(self):
+        results = [await self.limiter.hit("user:assess_ip", limit=3, window=60) for _ in range(4)]
+        self.assertEqual([r.allowed for r in results], [True, True, True, False])
+        self.assertEqual([r.remaining for r in results], [2, 1, 0, 0])
+        self.assertTrue(all(0 < r.reset <= 60 for r in results))
+
+    async def test_keys_are_independent(self):
+        await self.limiter.hit("user:a", limit=1, window=60)
+        self.assertFalse((await self.limiter.hit("user:a", limit=1, window=60)).allowed)
+        self.assertTrue((await self.limiter.hit("user:b", limit=1, window=60)).allowed)
+
+    async def test_window_rolls_over(self):
+        for _ in range(2):
+            await self.limiter.hit("user:roll", limit=2, window=1)
+        denied = await self.limiter.hit("user:roll", limit=2, window=1)
+        self.assertFalse(denied.allowed)
+        await asyncio.sleep(denied.reset + 0.05)
+        allowed = await self.limiter.hit("user:roll", limit=2, window=1)
+        self.assertTrue(allowed.allowed)
+        self.assertEqual(allowed.remaining, 1)
+
+    async def test_loads_script_when_not_cached(self):
+        await self.redis.script_flush()
+        self.assertTrue((await self.limiter.hit("user:flush", limit=1, window=60)).allowed)
+        self.assertEqual(await self.redis.script_exists(self.limiter._sha), [True])
+
+class TestFixedWindowScript(RedisScriptTests, RedisTestCase):
+    algorithm = "fixed_window"
+
+    async def test_repairs_key_without_ttl(self):
+        await self.redis.set("user:stuck", 10)
+        result = await self.limiter.hit("user:stuck", limit=3, window=60)
+        self.assertFalse(result.allowed)
+        self.assertGreater(await self.redis.pttl("user:stuck"), 0)
+
+class TestSlidingWindowScript(RedisScriptTests, RedisTestCase):
+    algorithm = "sliding_window"
+
+    async def test_rejected_requests_are_not_logged(self):
+        for _ in range(5):
+            await self.limiter.hit("user:log", limit=2, window=60)
+        self.assertEqual(await self.redis.zcard("user:log:log"), 2)
+
+if __name__ == "__main__":
+    unittest.main()
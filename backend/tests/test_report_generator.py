@@ -0,0 +1,28 @@
+import json
+import unittest
+from datetime import datetime
+from core.report_generator import generate_report, pack_report, report_json
+
+ASSESSMENT = {"target": "1.1.1.1", "type": "ip", "score": 40, "status": "High Risk", "threats": ["Botnet"], "details": {"abuse_score": 90}}
+
+class TestReportSnapshots(unittest.TestCase):
+    def test_stored_assessment_keeps_its_identity(self):
+        created_at = datetime(2024, 1, 2, 3, 4, 5)
+        report = generate_report({**ASSESSMENT, "report_id": "ip_report_abc123", "created_at": created_at})
+        self.assertEqual(report["report_id"], "ip_report_abc123")
+        self.assertEqual(report["created_at"], created_at.isoformat())
+
+    def test_new_reports_get_full_uuid_ids(self):
+        ids = {generate_report(ASSESSMENT)["report_id"] for _ in range(1000)}
+        self.assertEqual(len(ids), 1000)
+        self.assertRegex(next(iter(ids)), r"^ip_report_[0-9a-f]{32}$")
+
+    def test_snapshot_round_trip_and_stable_etag(self):
+        report = generate_report({**ASSESSMENT, "report_id": "ip_report_abc123", "created_at": datetime(2024, 1, 2)})
+        snapshot, etag = pack_report(report)
+        self.assertEqual(json.loads(report_json(snapshot)), report)
+        self.assertEqual(pack_report(report)[1], etag)
+        self.assertTrue(etag.startswith('"') and etag.endswith('"'))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import unittest
+from core.security_apis import SingleFlight, normalize_host
+
+class TestNormalizeHost(unittest.TestCase):
+    def test_strips_scheme_case_and_trailing_dot(self):
+        self.assertEqual(normalize_host("https://Example.COM./login"), "example.com")
+        self.assertEqual(normalize_host("8.8.8.8"), "8.8.8.8")
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight()
+        calls = 0
+
+        async def lookup():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"open_ports": [443]}
+
+        results = await asyncio.gather(*[flight.do(("shodan", "example.com"), lookup) for _ in range(10)])
+        self.assertEqual(calls, 1)
+        self.assertEqual(results, [{"open_ports": [443]}] * 10)
+        self.assertIsNot(results[0], results[1])
+        self.assertEqual(flight.stats(), {"in_flight": 0, "coalesced": 9})
+
+    async def test_cancelled_waiter_does_not_cancel_others(self):
+        flight = SingleFlight()
+
+        async def lookup():
+            await asyncio.sleep(0.02)
+            return {"ok": True}
+
+        first = asyncio.ensure_future(flight.do(("url", "x"), lookup))
+        second = asyncio.ensure_future(flight.do(("url", "x"), lookup))
+        await asyncio.sleep(0)
+        first.cancel()
+        self.assertEqual(await second, {"ok": True})
+        self.assertEqual(flight.stats()["in_flight"], 0)
+
+    async def test_last_waiter_cancelling_cancels_the_call(self):
+        flight = SingleFlight()
+        started = asyncio.Event()
+
+        async def lookup():
+            started.set()
+            await asyncio.sleep(10)
+
+        waiter = asyncio.ensure_future(flight.do(("url", "y"), lookup))
+        await started.wait()
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0)
+        self.assertEqual(flight.stats()["in_flight"], 0)
+
+    async def test_call_after_last_waiter_cancels_starts_fresh(self):
+        flight = SingleFlight()
+        started = asyncio.Event()
+        calls = 0
+
+        async def lookup():
+            nonlocal calls
+            calls += 1
+            started.set()
+            await asyncio.sleep(0.01 if calls > 1 else 10)
+            return {"call": calls}
+
+        waiter = asyncio.ensure_future(flight.do(("url", "z"), lookup))
+        await started.wait()
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        # The cancelled task's done-callback has not run yet
+        self.assertEqual(await flight.do(("url", "z"), lookup), {"call": 2})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import asyncio
+import unittest
+import uuid
+from types import SimpleNamespace
+from unittest.mock import patch
+from redis.exceptions import ConnectionError
+import api
+from config.config import config
+from core import user_cache as user_cache_module
+from core.user_cache import UserCache, AuthenticatedUser
+from redis_support import RedisTestCase
+
+class _UserTable:
+    """Stand-in AsyncSession answering get_current_user's lookup and counting queries."""
+
+    def __init__(self, plan: str):
+        self.row = SimpleNamespace(id=uuid.uuid4(), email="user@example.com", plan=plan)
+        self.queries = 0
+
+    async def execute(self, query):
+        self.queries += 1
+        return SimpleNamespace(first=lambda: self.row)
+
+class TestAuthenticatedUserCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.cache = UserCache()
+        patcher = patch.object(api, "user_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.token = api.create_access_token({"sub": "user@example.com"})
+
+    async def test_lookups_are_served_from_cache(self):
+        db = _UserTable("free")
+        await api.get_current_user(self.token, db)
+        user = await api.get_current_user(self.token, db)
+        self.assertEqual((user.plan, db.queries), ("free", 1))
+
+    async def test_invalidate_reloads_from_db(self):
+        db = _UserTable("free")
+        await api.get_current_user(self.token, db)
+        db.row.plan = "premium"
+        with patch.object(user_cache_module, "get_redis", side_effect=ConnectionError("redis down")):
+            await self.cache.invalidate("user@example.com")
+        user = await api.get_current_user(self.token, db)
+        self.assertEqual((user.plan, db.queries), ("premium", 2))
+
+    async def test_entries_expire(self):
+        cache = UserCache()
+        cache._cache.ttl = 0.01
+        cache.set("user@example.com", AuthenticatedUser(id=uuid.uuid4(), email="user@example.com", plan="free"))
+        await asyncio.sleep(0.02)
+        self.assertIsNone(cache.get("user@example.com"))
+
+class _DroppedPubSub:
+    async def subscribe(self, channel):
+        pass
+
+    async def get_message(self, **kwargs):
+        raise ConnectionError("connection lost")
+
+    async def close(self):
+        pass
+
+@patch.object(config, "USER_CACHE_RESUBSCRIBE_DELAY", 0.01)
+class TestUserCacheListener(unittest.IsolatedAsyncioTestCase):
+    async def test_disconnect_clears_cache(self):
+        cache = UserCache()
+        cache.set("user@example.com", AuthenticatedUser(id=uuid.uuid4(), email="user@example.com", plan="free"))
+        with patch.object(user_cache_module, "get_redis", lambda: SimpleNamespace(pubsub=_DroppedPubSub)):
+            cache.start()
+            await asyncio.sleep(0.05)
+            await cache.stop()
+        self.assertIsNone(cache.get("user@example.com"))
+
+class TestUserCacheInvalidation(RedisTestCase):
+    async def test_invalidation_reaches_other_workers(self):
+        other_worker, this_worker = UserCache(), UserCache()
+        user = AuthenticatedUser(id=uuid.uuid4(), email="user@example.com", plan="free")
+        other_worker.set(user.email, user)
+        other_worker.start()
+        self.addAsyncCleanup(other_worker.stop)
+        await asyncio.sleep(0.1)
+        await this_worker.invalidate(user.email)
+        for _ in range(100):
+            if other_worker.get(user.email) is None:
+                break
+            await asyncio.sleep(0.01)
+        self.assertIsNone(other_worker.get(user.email))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+import asyncio
+import unittest
+import uuid
+from unittest import mock
+from sqlalchemy.exc import IntegrityError
+from core.write_behind import AssessmentWriter
+
+def _record(user_id, n):
+    return {"user_id": user_id, "report_id": f"ip_report_{n}", "target": "1.1.1.1", "type": "ip", "score": 90, "status": "Secure", "threats": [], "details": {}}
+
+class TestAssessmentWriter(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        patcher = mock.patch("core.write_behind.AsyncSessionLocal", mock.MagicMock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user_id = uuid.uuid4()
+
+    def _writer(self, mode, **kwargs):
+        writer = AssessmentWriter(mode, **{"batch_size": 3, "flush_interval": 60, "max_pending": 10, **kwargs})
+        writer._persist = mock.AsyncMock(return_value={})
+        writer.start()
+        self.addAsyncCleanup(writer.stop)
+        return writer
+
+    async def test_write_behind_serves_lookaside_until_flushed(self):
+        writer = self._writer("async")
+        await writer.write(None, [_record(self.user_id, 1)])
+        self.assertEqual(writer.lookup("ip_report_1", self.user_id)["score"], 90)
+        self.assertIsNone(writer.lookup("ip_report_1", uuid.uuid4()))
+        writer._persist.assert_not_awaited()
+        await writer.flush()
+        self.assertEqual(len(writer._persist.await_args.args[1]), 1)
+        self.assertIsNone(writer.lookup("ip_report_1", self.user_id))
+
+    async def test_batch_size_triggers_one_multi_row_flush(self):
+        writer = self._writer("async")
+        await writer.write(None, [_record(self.user_id, n) for n in range(3)])
+        await asyncio.sleep(0.01)
+        writer._persist.assert_awaited_once()
+        self.assertEqual(writer.stats()["flushed"], 3)
+
+    async def test_group_commit_waits_for_flush(self):
+        writer = self._writer("group", batch_size=2)
+        await asyncio.gather(*[writer.write(None, [_record(self.user_id, n)]) for n in range(2)])
+        writer._persist.assert_awaited_once()
+        self.assertEqual(writer.stats()["flushed"], 2)
+
+    async def test_failed_flush_is_retried(self):
+        writer = self._writer("async")
+        writer._persist.side_effect = [RuntimeError("db down"), {}]
+        await writer.write(None, [_record(self.user_id, 1)])
+        await writer.flush()
+        self.assertIsNotNone(writer.lookup("ip_report_1", self.user_id))
+        await writer.flush()
+        self.assertEqual(writer.stats()["flushed"], 1)
+        self.assertIsNone(writer.lookup("ip_report_1", self.user_id))
+
+class TestAssessmentWriterShutdown(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        patcher = mock.patch("core.write_behind.AsyncSessionLocal", mock.MagicMock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user_id = uuid.uuid4()
+        self.persisted = []
+        self.persisting = asyncio.Event()
+
+    async def _slow_persist(self, db, records):
+        self.persisting.set()
+        await asyncio.sleep(0.05)
+        self.persisted.extend(record["report_id"] for record in records)
+        return {}
+
+    def _writer(self, mode):
+        writer = AssessmentWriter(mode, batch_size=1, flush_interval=60, max_pending=10)
+        writer._persist = self._slow_persist
+        writer.start()
+        return writer
+
+    async def test_stop_waits_for_in_flight_flush(self):
+        writer = self._writer("async")
+        await writer.write(None, [_record(self.user_id, 1)])
+        await self.persisting.wait()
+        await writer.write(None, [_record(self.user_id, 2)])
+        await writer.stop()
+        self.assertEqual(self.persisted, ["ip_report_1", "ip_report_2"])
+        self.assertEqual((writer._buffer, writer._pending), ([], {}))
+
+    async def test_stop_resolves_group_writers(self):
+        writer = self._writer("group")
+        write = asyncio.create_task(writer.write(None, [_record(self.user_id, 1)]))
+        await self.persisting.wait()
+        await writer.stop()
+        await asyncio.wait_for(write, 1)
+        self.assertEqual(self.persisted, ["ip_report_1"])
+
+    async def test_cancelled_flush_requeues_batch(self):
+        writer = self._writer("async")
+        await writer.write(None, [_record(self.user_id, 1)])
+        await self.persisting.wait()
+        writer._flusher.cancel()
+        await asyncio.gather(writer._flusher, return_exceptions=True)
+        self.assertEqual([record["report_id"] for record, _ in writer._buffer], ["ip_report_1"])
+        self.assertIsNotNone(writer.lookup("ip_report_1", self.user_id))
+        await writer.stop()
+        self.assertEqual(self.persisted, ["ip_report_1"])
+
+class _Savepoint:
+    def __init__(self, session):
+        self.session = session
+
+    async def __aenter__(self):
+        self.session.staged = []
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.session.committed.extend(self.session.staged)
+        self.session.staged = []
+        return False
+
+class _Session:
+    """Stand-in AsyncSession whose inserts fail on report ids listed in poisoned."""
+
+    def __init__(self, poisoned):
+        self.poisoned = poisoned
+        self.staged = []
+        self.committed = []
+        self.inserts = 0
+
+    async def execute(self, statement, rows):
+        self.inserts += 1
+        if any(row["report_id"] in self.poisoned for row in rows):
+            raise IntegrityError("INSERT INTO assessments", {}, Exception("duplicate key value violates unique constraint"))
+        self.staged.extend(row["report_id"] for row in rows)
+
+    def begin_nested(self):
+        return _Savepoint(self)
+
+    async def rollback(self):
+        self.staged = []
+
+    async def commit(self):
+        self.committed.extend(self.staged)
+        self.staged = []
+
+class TestAssessmentWriterRejectedRows(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.session = _Session(poisoned={"ip_report_0"})
+        session_factory = mock.MagicMock()
+        session_factory.return_value.__aenter__ = mock.AsyncMock(return_value=self.session)
+        session_factory.return_value.__aexit__ = mock.AsyncMock(return_value=False)
+        for target, mocked in (("core.write_behind.AsyncSessionLocal", session_factory), ("core.write_behind.record_scans", mock.AsyncMock())):
+            patcher = mock.patch(target, mocked)
+            self.record_scans = patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user_id = uuid.uuid4()
+
+    async def test_poisoned_row_does_not_block_later_rows(self):
+        writer = AssessmentWriter("async", batch_size=100, flush_interval=60, max_pending=10)
+        writer.start()
+        self.addAsyncCleanup(writer.stop)
+        await writer.write(None, [_record(self.user_id, n) for n in range(3)])
+        await writer.flush()
+        self.assertEqual(self.session.committed, ["ip_report_1", "ip_report_2"])
+        self.assertEqual(writer._buffer, [])
+        self.assertEqual(writer.stats()["rejected"], 1)
+        self.assertEqual(self.record_scans.await_args.args[2], 2)
+        await writer.write(None, [_record(self.user_id, 3)])
+        await writer.flush()
+        self.assertEqual(self.session.committed[-1], "ip_report_3")
+
+    async def test_group_writer_learns_which_rows_were_rejected(self):
+        writer = AssessmentWriter("group", batch_size=3, flush_interval=60, max_pending=10)
+        writer.start()
+        self.addAsyncCleanup(writer.stop)
+        rejected = await writer.write(None, [_record(self.user_id, n) for n in range(3)])
+        self.assertEqual(rejected, {"ip_report_0"})
+        write = asyncio.ensure_future(writer.write(None, [_record(self.user_id, 0)]))
+        await asyncio.sleep(0)
+        await writer.flush()
+        with self.assertRaises(IntegrityError):
+            await write
+
+    async def test_sync_write_isolates_rejected_row(self):
+        writer = AssessmentWriter("sync")
+        self.assertEqual(await writer.write(self.session, [_record(self.user_id, n) for n in range(2)]), {"ip_report_0"})
+        self.assertEqual(self.session.committed, ["ip_report_1"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import asyncio
+import os
+from fastapi import HTTPException, Response
+from fastapi.responses import StreamingResponse
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match may carry several tags, weak tags or "*"
+    if not if_none_match or not etag:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+def parse_range(range_header: str, size: int) -> tuple:
+    # Returns an inclusive (start, end) for a single "bytes=" range, or None to send the
+    # whole body (no header, multiple ranges or an unparseable one)
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    first, sep, last = range_header[len("bytes="):].strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first == "":
+            start, end = max(0, size - int(last)), size - 1
+        else:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise HTTPException(status_code=416, detail="Requested range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+def _requested_range(headers: dict, size: int, range_header: str, if_range: str) -> tuple:
+    # A stale If-Range means the client's partial copy is outdated: send everything
+    if if_range and if_range != headers.get("ETag"):
+        return None
+    return parse_range(range_header, size)
+
+CHUNK_SIZE = 64 * 1024
+
+def _read_slice(f, start: int, length: int) -> bytes:
+    return os.pread(f.fileno(), length, start)
+
+async def _stream_file(f, start: int, length: int):
+    # Chunks are read in a thread from the already-open file, which stays readable even if
+    # the cache evicts it mid-download
+    try:
+        while length > 0:
+            chunk = await asyncio.to_thread(_read_slice, f, start, min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            start += len(chunk)
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+async def file_range_response(path: str, media_type: str, headers: dict, range_header: str = None, if_range: str = None) -> Response:
+    # 200 with the whole file or 206 with one byte range. Raises FileNotFoundError if the
+    # file is gone before it is opened; once opened, removal no longer matters.
+    f = await asyncio.to_thread(open, path, "rb")
+    try:
+        size = os.fstat(f.fileno()).st_size
+        headers = {**headers, "Accept-Ranges": "bytes"}
+        byte_range = _requested_range(headers, size, range_header, if_range)
+    except BaseException:
+        f.close()
+        raise
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(_stream_file(f, start, end - start + 1), status_code=status_code, media_type=media_type, headers=headers)
@@ -0,0 +1,18 @@
+import base64
+import uuid
+from datetime import datetime
+from fastapi import HTTPException
+
+# Opaque keyset cursors over (timestamp, id) orderings
+
+def encode_cursor(created_at: datetime, id) -> str:
+    raw = f"{created_at.isoformat()}|{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -0,0 +1,36 @@
+import asyncio
+from config.config import config
+from core.community_index import community_index
+from core.http_client import init_http_session, close_http_session
+from core.jobs import job_queue
+from core.notifications import notification_queue
+from core.write_behind import assessment_writer
+from core.redis_client import close_redis
+from db.database import async_engine
+from utils.logger import logger
+
+async def main():
+    await job_queue.connect(start_local_workers=False)
+    if not job_queue.use_redis:
+        logger.error("Assessment worker requires Redis; jobs run in-process when it is unavailable")
+        await close_redis()
+        return
+    await init_http_session()
+    await notification_queue.start()
+    assessment_writer.start()
+    await community_index.start()
+    await job_queue.register_worker()
+    logger.info(f"Assessment worker started with {config.JOB_WORKER_CONCURRENCY} consumers")
+    try:
+        await asyncio.gather(*[job_queue.work() for _ in range(config.JOB_WORKER_CONCURRENCY)])
+    finally:
+        await job_queue.unregister_worker()
+        await community_index.stop()
+        await assessment_writer.stop()
+        await notification_queue.stop()
+        await close_http_session()
+        await async_engine.dispose()
+        await close_redis()
+
+if __name__ == "__main__":
+    asyncio.run(main())